@@ -0,0 +1,91 @@
+"""
+JSON API против HTML-страниц: байты и процессорное время на запрос.
+
+Кэш страниц отключён, чтобы каждый ответ строился заново. Детальная
+страница HTML показывает первую страницу комментариев, а API отдаёт
+их все потоком, поэтому для неё приведены оба варианта. Запуск из
+корня репозитория:
+
+    python benchmarks/api.py --news 1000 --comments 2000
+"""
+import argparse
+import time
+
+from common import print_table, setup_django
+
+REPEAT = 50
+
+
+def seed(news_count, comment_count):
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='Автор')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 20)
+        for index in range(news_count)
+    )
+    news = News.objects.first()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(comment_count)
+    )
+    news.comment_count = comment_count
+    news.save()
+    return news
+
+
+def measure_request(client, url, params=None):
+    """Средние байты и миллисекунды процессора на один запрос."""
+    size = 0
+    started = time.process_time()
+    for _ in range(REPEAT):
+        response = client.get(url, params)
+        if response.streaming:
+            size = sum(map(len, response.streaming_content))
+        else:
+            size = len(response.content)
+    elapsed = (time.process_time() - started) / REPEAT
+    return size, elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django('ya_news', NEWS_PAGE_CACHE_TIMEOUT=0, DEBUG=False)
+    from django.test import Client
+    from django.urls import reverse
+
+    news = seed(args.news, args.comments)
+    client = Client()
+    cases = (
+        ('лента, HTML', reverse('news:home'), None),
+        ('лента, JSON', reverse('news:api_list'), None),
+        (
+            'лента, JSON ?fields=id,title', reverse('news:api_list'),
+            {'fields': 'id,title'},
+        ),
+        ('новость, HTML', reverse('news:detail', args=(news.pk,)), None),
+        (
+            'новость, JSON без комментариев',
+            reverse('news:api_detail', args=(news.pk,)),
+            {'fields': 'id,title,text,date,comment_count'},
+        ),
+        (
+            'новость, JSON со всеми комментариями',
+            reverse('news:api_detail', args=(news.pk,)),
+            None,
+        ),
+    )
+    rows = []
+    for label, url, params in cases:
+        size, cpu = measure_request(client, url, params)
+        rows.append((label, size, f'{cpu:.2f}'))
+    print_table(('ответ', 'байт', 'CPU, мс'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Профили сессий и аутентификации: запросы к базе и время на запрос.
+
+Сравнивает профиль 'db' (сессия и пользователь из базы) с профилем
+'cache' (cached_db-сессии и кэш пользователя) на странице новости
+ya_news и списке заметок ya_note. Каждый вариант запускается
+в отдельном процессе с переменной окружения AUTH_PROFILE. Запуск
+из корня репозитория:
+
+    python benchmarks/auth.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import print_table, setup_django
+
+PROFILES = ('db', 'cache')
+PAGES = {
+    'ya_news': 'NewsDetail',
+    'ya_note': 'NotesList',
+}
+REPEAT = 200
+
+
+def prepare(project):
+    """Создаёт пользователя с данными и возвращает адрес страницы."""
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    user = get_user_model().objects.create(username='Автор')
+    if project == 'ya_news':
+        from news.models import News
+        news = News.objects.create(title='Заголовок', text='Текст')
+        return user, reverse('news:detail', args=(news.pk,))
+    from notes.models import Note
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+             author=user)
+        for index in range(20)
+    )
+    return user, reverse('notes:list')
+
+
+def run(project):
+    setup_django(project)
+    from django.test import Client
+
+    user, url = prepare(project)
+    client = Client()
+    client.force_login(user)
+    client.get(url)
+    queries = 0
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        queries += client.get(url).query_count
+    elapsed = (time.perf_counter() - started) / REPEAT
+    print(json.dumps({'queries': queries / REPEAT, 'ms': elapsed * 1000}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--project', choices=PAGES)
+    args = parser.parse_args()
+    if args.project:
+        run(args.project)
+        return
+
+    rows = []
+    for project, page in PAGES.items():
+        for profile in PROFILES:
+            output = subprocess.run(
+                [sys.executable, __file__, '--project', project],
+                env={**os.environ, 'AUTH_PROFILE': profile},
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            rows.append((
+                page, profile, f'{result["queries"]:.1f}',
+                f'{result["ms"]:.2f}',
+            ))
+    print_table(('страница', 'профиль', 'запросов', 'мс'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Общие функции для запуска замеров производительности."""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS_MODULES = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def setup_django(project, database=None, **overrides):
+    """
+    Подключает проект и настраивает Django.
+
+    По умолчанию замеры работают с временной базой, чтобы не трогать
+    db.sqlite3 проекта. Схема создаётся миграциями. Соединения в режиме
+    URI (реплика только для чтения) открывают ту же базу с mode=ro.
+    Лента новостей пишется во временный каталог, чтобы не взять файл,
+    собранный по другой базе. overrides заменяют настройки проекта
+    до запуска Django.
+    """
+    sys.path.insert(0, str(ROOT_DIR / project))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS_MODULES[project])
+    from django.conf import settings
+    if database is None:
+        database = Path(tempfile.mkdtemp()) / 'bench.sqlite3'
+    for alias in settings.DATABASES.values():
+        if alias.get('OPTIONS', {}).get('uri'):
+            alias['NAME'] = f'file:{database}?mode=ro'
+        else:
+            alias['NAME'] = database
+    settings.ALLOWED_HOSTS = ['*']
+    if hasattr(settings, 'NEWS_FEED_PATH'):
+        settings.NEWS_FEED_PATH = Path(tempfile.mkdtemp()) / 'news.atom'
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return database
+
+
+def measure(func, repeat):
+    """Возвращает среднее время одного вызова func в секундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def print_table(header, rows):
+    widths = [
+        max(len(str(row[index])) for row in [header, *rows])
+        for index in range(len(header))
+    ]
+    for row in [header, *rows]:
+        print('  '.join(
+            str(cell).rjust(width) for cell, width in zip(row, widths)
+        ))
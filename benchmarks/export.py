@@ -0,0 +1,76 @@
+"""
+Потоковая выгрузка заметок: пиковая память и скорость.
+
+Заполняет временную базу ya_note заметками одного автора и выгружает
+их в NDJSON и ZIP. Пик памяти (tracemalloc) не должен расти вместе с
+числом заметок. Запуск из корня репозитория:
+
+    python benchmarks/export.py --sizes 10000 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from common import print_table, setup_django
+
+TEXT = 'Текст заметки для выгрузки. ' * 40
+BATCH_SIZE = 10_000
+
+
+def seed(author_id, count, start):
+    from django.db import connection, transaction
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(start, start + count, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO notes_note (title, text, slug, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    (f'Заметка {number}', TEXT, f'note-{number}', author_id)
+                    for number in range(
+                        offset, min(offset + BATCH_SIZE, start + count)
+                    )
+                ],
+            )
+
+
+def consume(stream):
+    """Байты и пик памяти при чтении потока."""
+    tracemalloc.start()
+    size = sum(len(chunk) for chunk in stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=(10_000, 100_000)
+    )
+    args = parser.parse_args()
+    setup_django('ya_note')
+    from django.contrib.auth import get_user_model
+    from notes.export import iter_ndjson, iter_zip
+
+    author = get_user_model().objects.create(username='Автор')
+    rows = []
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed(author.pk, size - seeded, seeded)
+        seeded = size
+        for label, stream in (('ndjson', iter_ndjson), ('zip', iter_zip)):
+            started = time.perf_counter()
+            length, peak = consume(stream(author))
+            elapsed = time.perf_counter() - started
+            rows.append((
+                size, label, f'{length / 2 ** 20:.1f}',
+                f'{peak / 2 ** 20:.2f}', f'{size / elapsed:.0f}',
+            ))
+    print_table(
+        ('заметок', 'формат', 'МиБ', 'пик памяти, МиБ', 'заметок/с'), rows
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Подготовка тестовых данных: create() и save() в цикле против фабрик.
+
+Создаёт комментарии к новости так, как это делала фикстура
+several_comments (create, затем save с новой датой), и через
+make_comments из news/pytest_tests/factories.py. Каждый размер
+замеряется в транзакции, которая затем откатывается. Запуск из корня
+репозитория:
+
+    python benchmarks/fixtures.py --sizes 10 1000 5000
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from common import print_table, setup_django
+
+
+class Rollback(Exception):
+    pass
+
+
+def one_by_one(news, author, count):
+    from django.utils import timezone
+    from news.models import Comment
+
+    for index in range(count):
+        comment = Comment.objects.create(
+            news=news, author=author, text=f'Комментарий {index}'
+        )
+        comment.created = timezone.now() + timedelta(days=index)
+        comment.save()
+
+
+def timed(func, *args):
+    """Время func в транзакции, которая потом откатывается."""
+    from django.db import transaction
+
+    started = time.perf_counter()
+    try:
+        with transaction.atomic():
+            func(*args)
+            elapsed = time.perf_counter() - started
+            raise Rollback
+    except Rollback:
+        return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=(10, 1000, 5000)
+    )
+    args = parser.parse_args()
+    setup_django('ya_news')
+    from news.models import News
+    from news.pytest_tests.factories import make_comments, make_users
+
+    (author,) = make_users(('Автор',))
+    news = News.objects.create(title='Заголовок', text='Новость')
+    rows = []
+    for size in args.sizes:
+        slow = timed(one_by_one, news, author, size)
+        fast = timed(make_comments, news, author, size)
+        rows.append((
+            size, f'{slow * 1000:.0f}', f'{fast * 1000:.0f}',
+            f'{slow / fast:.1f}',
+        ))
+    print_table(('комментариев', 'create+save, мс', 'фабрика, мс', 'x'), rows)
+
+
+if __name__ == '__main__':
+    main()
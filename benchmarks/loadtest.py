@@ -0,0 +1,475 @@
+"""
+Нагрузочный прогон всех именованных маршрутов проектов.
+
+Заполняет временную базу пользователями, новостями, комментариями
+и заметками, затем параллельно обращается к каждому маршруту
+news.urls, notes.urls и users через встроенный клиент Django (WSGI)
+или AsyncClient (ASGI). Для каждого маршрута считаются p50/p95/p99
+задержки, запросы в секунду и SQL-запросы на запрос. Результат
+пишется в JSON, чтобы сравнивать прогоны между собой. Запуск из корня
+репозитория:
+
+    python benchmarks/loadtest.py --concurrency 8 --output loadtest.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from common import ROOT_DIR, print_table, setup_django
+
+PROJECTS = {
+    'ya_news': ('news', 'users'),
+    'ya_note': ('notes', 'users'),
+}
+WORDS = (
+    'погода', 'выборы', 'футбол', 'экономика', 'наука', 'кино', 'театр',
+    'космос', 'транспорт', 'здоровье', 'школа', 'музыка',
+)
+
+
+class Route:
+    """
+    Один сценарий нагрузки: маршрут, метод и кто обращается.
+
+    url и data — функции от состояния потока и генератора случайных
+    чисел, чтобы запросы расходились по разным объектам.
+    """
+
+    def __init__(self, name, url, method='get', user=False, data=None):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.user = user
+        self.data = data or (lambda state, rng: None)
+
+    @property
+    def label(self):
+        who = 'user' if self.user else 'anonymous'
+        return f'{self.method.upper()} {self.name} ({who})'
+
+
+def seed_news(sizes, rng):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from news.models import Comment, News
+
+    user_model = get_user_model()
+    user_model.objects.bulk_create(
+        user_model(username=f'user{index}') for index in range(sizes.users)
+    )
+    News.objects.bulk_create(
+        News(
+            title=' '.join(rng.sample(WORDS, 3)).capitalize(),
+            text=' '.join(rng.choices(WORDS, k=30)),
+        )
+        for _ in range(sizes.news)
+    )
+    user_ids = list(user_model.objects.values_list('pk', flat=True))
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    for offset in range(0, sizes.comments, 10_000):
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=rng.choice(news_ids),
+                author_id=rng.choice(user_ids),
+                text=' '.join(rng.choices(WORDS, k=10)),
+            )
+            for _ in range(min(10_000, sizes.comments - offset))
+        )
+    call_command('recount_comments', stdout=open(os.devnull, 'w'))
+    return {'news': news_ids}
+
+
+def seed_notes(sizes, rng):
+    from django.contrib.auth import get_user_model
+    from notes.models import Note
+
+    user_model = get_user_model()
+    user_model.objects.bulk_create(
+        user_model(username=f'user{index}') for index in range(sizes.users)
+    )
+    user_ids = list(user_model.objects.values_list('pk', flat=True))
+    for offset in range(0, sizes.notes, 10_000):
+        Note.objects.bulk_create(
+            Note(
+                title=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                text=' '.join(rng.choices(WORDS, k=30)),
+                slug=f'note-{index}',
+                author_id=rng.choice(user_ids),
+            )
+            for index in range(
+                offset, min(offset + 10_000, sizes.notes)
+            )
+        )
+    return {}
+
+
+def user_state(project, user):
+    """Объекты пользователя, к которым у него есть доступ."""
+    if project == 'ya_news':
+        from news.models import Comment
+        objects = Comment.objects.filter(author=user)
+        return {'comments': list(objects.values_list('pk', flat=True)[:100])}
+    from notes.models import Note
+    objects = Note.objects.filter(author=user)
+    return {'notes': list(objects.values_list('slug', flat=True)[:100])}
+
+
+def news_routes(data):
+    from django.urls import reverse
+
+    def news_url(name):
+        return lambda state, rng: reverse(
+            name, args=(rng.choice(data['news']),)
+        )
+
+    def comment_url(name):
+        return lambda state, rng: reverse(
+            name, args=(rng.choice(state['comments']),)
+        )
+
+    return [
+        Route('news:home', lambda state, rng: reverse('news:home')),
+        Route(
+            'news:search',
+            lambda state, rng: (
+                f'{reverse("news:search")}?q={rng.choice(WORDS)}'
+            ),
+        ),
+        Route('news:feed', lambda state, rng: reverse('news:feed')),
+        Route('news:detail', news_url('news:detail')),
+        Route('news:detail', news_url('news:detail'), user=True),
+        Route(
+            'news:detail', news_url('news:detail'), method='post',
+            user=True,
+            data=lambda state, rng: {'text': ' '.join(rng.sample(WORDS, 5))},
+        ),
+        Route('news:comments', news_url('news:comments')),
+        Route('news:events', news_url('news:events')),
+        Route('news:edit', comment_url('news:edit'), user=True),
+        Route('news:delete', comment_url('news:delete'), user=True),
+        Route('news:api_list', lambda state, rng: reverse('news:api_list')),
+        Route('news:api_detail', news_url('news:api_detail')),
+    ]
+
+
+def notes_routes(data):
+    from django.urls import reverse
+
+    def note_url(name):
+        return lambda state, rng: reverse(
+            name, args=(rng.choice(state['notes']),)
+        )
+
+    counter = itertools.count()
+    return [
+        Route('notes:home', lambda state, rng: reverse('notes:home')),
+        Route('notes:home', lambda state, rng: reverse('notes:home'),
+              user=True),
+        Route('notes:list', lambda state, rng: reverse('notes:list'),
+              user=True),
+        Route(
+            'notes:search',
+            lambda state, rng: (
+                f'{reverse("notes:search")}?q={rng.choice(WORDS)}'
+            ),
+            user=True,
+        ),
+        Route('notes:export', lambda state, rng: reverse('notes:export'),
+              user=True),
+        Route('notes:import', lambda state, rng: reverse('notes:import'),
+              user=True),
+        Route('notes:add', lambda state, rng: reverse('notes:add'),
+              user=True),
+        Route(
+            'notes:add', lambda state, rng: reverse('notes:add'),
+            method='post', user=True,
+            data=lambda state, rng: {
+                'title': ' '.join(rng.sample(WORDS, 3)),
+                'text': ' '.join(rng.choices(WORDS, k=30)),
+                'slug': f'load-{next(counter)}',
+            },
+        ),
+        Route('notes:detail', note_url('notes:detail'), user=True),
+        Route('notes:edit', note_url('notes:edit'), user=True),
+        Route('notes:delete', note_url('notes:delete'), user=True),
+        Route('notes:success', lambda state, rng: reverse('notes:success'),
+              user=True),
+    ]
+
+
+def users_routes():
+    from django.urls import reverse
+
+    return [
+        Route(f'users:{name}', lambda state, rng, name=name: reverse(
+            f'users:{name}'
+        ))
+        for name in ('login', 'signup', 'logout')
+    ]
+
+
+def named_routes(namespaces):
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    names = set()
+    for namespace in namespaces:
+        _, namespace_resolver = resolver.namespace_dict[namespace]
+        names.update(
+            f'{namespace}:{name}' for name in namespace_resolver.reverse_dict
+            if isinstance(name, str)
+        )
+    return names
+
+
+def percentile(ordered, share):
+    """Значение по методу ближайшего ранга."""
+    index = max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(route, samples, elapsed):
+    latencies = sorted(latency for latency, _, _ in samples)
+    return {
+        'label': route.label,
+        'route': route.name,
+        'method': route.method.upper(),
+        'user': route.user,
+        'requests': len(samples),
+        'errors': sum(status >= 500 for _, status, _ in samples),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries': round(
+            sum(queries for _, _, queries in samples) / len(samples), 2
+        ),
+    }
+
+
+def make_workers(project, concurrency, client_class):
+    from django.contrib.auth import get_user_model
+
+    users = list(get_user_model().objects.order_by('pk')[:concurrency])
+    workers = []
+    for number in range(concurrency):
+        user = users[number % len(users)]
+        user_client = client_class()
+        user_client.force_login(user)
+        workers.append({
+            'rng': random.Random(number),
+            'anonymous': client_class(),
+            'user': user_client,
+            'state': user_state(project, user),
+        })
+    return workers
+
+
+def request_kwargs(route, worker):
+    """
+    Аргументы запроса клиента.
+
+    Формы отправляются как application/x-www-form-urlencoded: multipart
+    в AsyncClient Django 3.2 читает тело с ошибкой.
+    """
+    data = route.data(worker['state'], worker['rng'])
+    if route.method == 'post':
+        return {
+            'data': urlencode(data),
+            'content_type': 'application/x-www-form-urlencoded',
+        }
+    return {'data': data}
+
+
+def record(samples, started, response):
+    if getattr(response, 'streaming', False):
+        # Потоковый ответ строится при чтении: его время тоже считаем.
+        for _ in response.streaming_content:
+            pass
+    samples.append((
+        time.perf_counter() - started,
+        response.status_code,
+        getattr(response, 'query_count', 0),
+    ))
+
+
+def drive_wsgi(route, workers, requests):
+    samples = []
+
+    def work(worker, count):
+        client = worker['user' if route.user else 'anonymous']
+        for _ in range(count):
+            url = route.url(worker['state'], worker['rng'])
+            kwargs = request_kwargs(route, worker)
+            started = time.perf_counter()
+            response = getattr(client, route.method)(url, **kwargs)
+            record(samples, started, response)
+
+    threads = [
+        threading.Thread(target=work, args=(worker, count))
+        for worker, count in zip(workers, split(requests, len(workers)))
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def drive_asgi(route, workers, requests):
+    samples = []
+
+    async def work(worker, count):
+        client = worker['user' if route.user else 'anonymous']
+        for _ in range(count):
+            url = route.url(worker['state'], worker['rng'])
+            kwargs = request_kwargs(route, worker)
+            started = time.perf_counter()
+            response = await getattr(client, route.method)(url, **kwargs)
+            record(samples, started, response)
+
+    async def work_all():
+        await asyncio.gather(*(
+            work(worker, count)
+            for worker, count in zip(workers, split(requests, len(workers)))
+        ))
+
+    started = time.perf_counter()
+    asyncio.run(work_all())
+    return samples, time.perf_counter() - started
+
+
+def split(total, parts):
+    return [total // parts + (index < total % parts) for index in range(parts)]
+
+
+def run(args):
+    setup_django(args.project, DEBUG=False)
+    from django.test import AsyncClient, Client
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    if args.project == 'ya_news':
+        data = seed_news(args, rng)
+        routes = news_routes(data)
+    else:
+        data = seed_notes(args, rng)
+        routes = notes_routes(data)
+    routes += users_routes()
+    seed_seconds = time.perf_counter() - started
+
+    missing = named_routes(PROJECTS[args.project]) - {
+        route.name for route in routes
+    }
+    if missing:
+        print(f'Без сценария: {", ".join(sorted(missing))}', file=sys.stderr)
+
+    asgi = args.interface == 'asgi'
+    workers = make_workers(
+        args.project, args.concurrency, AsyncClient if asgi else Client
+    )
+    drive = drive_asgi if asgi else drive_wsgi
+    results = []
+    for route in routes:
+        samples, elapsed = drive(route, workers, args.requests)
+        results.append(summarize(route, samples, elapsed))
+    print(json.dumps({
+        'project': args.project,
+        'seed_seconds': round(seed_seconds, 1),
+        'routes': results,
+    }))
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--project', choices=PROJECTS, action='append',
+        help='По умолчанию оба проекта.',
+    )
+    parser.add_argument('--interface', choices=('wsgi', 'asgi'),
+                        default='wsgi')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов на каждый маршрут.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--notes', type=int, default=5000)
+    parser.add_argument('--output', help='Файл для отчёта в JSON.')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        args.project = args.project[0]
+        run(args)
+        return
+
+    options = [
+        '--interface', args.interface,
+        '--requests', str(args.requests),
+        '--concurrency', str(args.concurrency),
+        '--users', str(args.users),
+        '--news', str(args.news),
+        '--comments', str(args.comments),
+        '--notes', str(args.notes),
+    ]
+    runs = []
+    for project in args.project or PROJECTS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--project', project,
+             *options],
+            check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    report = {
+        'revision': git_revision(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'interface': args.interface,
+        'concurrency': args.concurrency,
+        'seed': {
+            'users': args.users, 'news': args.news,
+            'comments': args.comments, 'notes': args.notes,
+        },
+        'runs': runs,
+    }
+    for project_run in runs:
+        print(project_run['project'])
+        print_table(
+            ('маршрут', 'запросов', 'ошибок', 'req/s', 'p50, мс', 'p95, мс',
+             'p99, мс', 'SQL'),
+            [
+                (
+                    route['label'], route['requests'], route['errors'],
+                    route['rps'], route['p50_ms'], route['p95_ms'],
+                    route['p99_ms'], route['queries'],
+                )
+                for route in project_run['routes']
+            ],
+        )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Загрузка заметок из NDJSON: пакетный импорт против Note.save.
+
+Готовит файл с --notes заметками, у которых часто совпадают
+заголовки, и загружает его через NoteImporter с разными размерами
+пакета. Для сравнения первые --single записей сохраняются по одной,
+как при добавлении через форму. Запуск из корня репозитория:
+
+    python benchmarks/notes_import.py --notes 100000
+"""
+import argparse
+import io
+import itertools
+import json
+import random
+import time
+
+from common import print_table, setup_django
+
+TITLES = ('Список покупок', 'Идеи', 'Книги', 'Рецепт', 'Встреча')
+TEXT = 'Текст заметки для загрузки. ' * 10
+
+
+def ndjson(count, rng):
+    lines = (
+        json.dumps(
+            {'title': f'{rng.choice(TITLES)} {rng.randint(1, 20)}',
+             'text': TEXT},
+            ensure_ascii=False,
+        )
+        for _ in range(count)
+    )
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--single', type=int, default=2000)
+    parser.add_argument(
+        '--batch-sizes', type=int, nargs='+', default=(100, 1000, 5000)
+    )
+    args = parser.parse_args()
+    setup_django('ya_note')
+    from django.contrib.auth import get_user_model
+    from notes.imports import NoteImporter, iter_records
+    from notes.models import Note
+
+    rng = random.Random(0)
+    content = ndjson(args.notes, rng)
+    rows = []
+    author = get_user_model().objects.create(username='single')
+    started = time.perf_counter()
+    records = iter_records(io.BytesIO(content))
+    for _, record in itertools.islice(records, args.single):
+        Note(author=author, **record).save()
+    elapsed = time.perf_counter() - started
+    rows.append(('Note.save', args.single, f'{args.single / elapsed:.0f}'))
+    for batch_size in args.batch_sizes:
+        author = get_user_model().objects.create(username=f'b{batch_size}')
+        importer = NoteImporter(author, batch_size).run(
+            iter_records(io.BytesIO(content))
+        )
+        rows.append((
+            f'пакеты по {batch_size}', importer.imported,
+            f'{importer.rate:.0f}',
+        ))
+    print_table(('способ', 'заметок', 'строк/с'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Поиск по заметкам одного автора среди заметок многих пользователей.
+
+Заполняет временную базу ya_note: у проверяемого автора --notes
+заметок, ещё столько же на каждого из --others других авторов.
+Сравнивает время первой страницы поиска FTS5 и icontains по заметкам
+автора для частых и редких слов. Запуск из корня репозитория:
+
+    python benchmarks/notes_search.py --notes 100000 --others 3
+"""
+import argparse
+import itertools
+import random
+import time
+
+from common import measure, print_table, setup_django
+
+ALPHABET = 'абвгдежзиклмнопрстуфхцчшэюя'
+VOCABULARY_SIZE = 20_000
+WORDS_IN_TEXT = 30
+BATCH_SIZE = 10_000
+REPEAT = 5
+
+
+def seed(author_ids, notes, vocabulary, rng):
+    from django.db import connection, transaction
+
+    cum_weights = list(itertools.accumulate(
+        1 / (rank + 1) for rank in range(len(vocabulary))
+    ))
+    started = time.perf_counter()
+    number = itertools.count()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for author_id in author_ids:
+            for offset in range(0, notes, BATCH_SIZE):
+                batch = []
+                for _ in range(min(BATCH_SIZE, notes - offset)):
+                    words = rng.choices(
+                        vocabulary, cum_weights=cum_weights, k=WORDS_IN_TEXT
+                    )
+                    batch.append((
+                        ' '.join(words[:3]).capitalize(),
+                        ' '.join(words),
+                        f'note-{next(number)}',
+                        author_id,
+                    ))
+                cursor.executemany(
+                    'INSERT INTO notes_note (title, text, slug, author_id) '
+                    'VALUES (%s, %s, %s, %s)',
+                    batch,
+                )
+    elapsed = time.perf_counter() - started
+    print(f'Заполнено {notes * len(author_ids)} заметок за {elapsed:.0f} с')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--others', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django('ya_note')
+    from django.contrib.auth import get_user_model
+    from django.db.models import Q
+    from notes.models import Note
+    from notes.search import search_notes
+
+    users = [
+        get_user_model().objects.create(username=f'user{index}')
+        for index in range(args.others + 1)
+    ]
+    rng = random.Random(0)
+    vocabulary = list({
+        ''.join(rng.choices(ALPHABET, k=rng.randint(4, 9)))
+        for _ in range(VOCABULARY_SIZE)
+    })
+    seed([user.pk for user in users], args.notes, vocabulary, rng)
+    author = users[0]
+    queries = {
+        'частое слово': vocabulary[0],
+        'среднее слово': vocabulary[len(vocabulary) // 10],
+        'редкое слово': vocabulary[-1],
+        'нет в базе': 'щщщщщ',
+    }
+    rows = []
+    for label, word in queries.items():
+        fts = measure(lambda: search_notes(author.pk, word, 50), REPEAT)
+        naive = measure(
+            lambda: list(Note.objects.filter(author=author).filter(
+                Q(title__icontains=word) | Q(text__icontains=word)
+            )[:50]),
+            REPEAT,
+        )
+        rows.append((
+            label, f'{naive * 1000:.1f}', f'{fts * 1000:.2f}',
+            f'{naive / fts:.0f}x',
+        ))
+    print_table(('запрос', 'icontains, мс', 'FTS5, мс', 'ускорение'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Сравнение проверки запрещённых слов в CommentForm.clean_text.
+
+Цикл ищет каждое слово отдельно, автомат Ахо — Корасик проходит текст
+один раз. По точке, где автомат обгоняет цикл, выбрана граница
+AUTOMATON_MIN_WORDS в news/moderation.py. Запуск из корня репозитория:
+
+    python benchmarks/profanity.py
+"""
+import random
+
+from common import measure, print_table, setup_django
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+SIZES = (2, 10, 50, 100, 200, 500, 1_000, 10_000)
+TEXT_LENGTH = 500
+REPEAT = 200
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def main():
+    setup_django('ya_news')
+    from news.moderation import SubstringMatcher, WordMatcher
+
+    rng = random.Random(0)
+    text = ' '.join(
+        random_word(rng, rng.randint(3, 9)) for _ in range(TEXT_LENGTH // 6)
+    )
+    rows = []
+    for size in SIZES:
+        words = [random_word(rng, rng.randint(6, 12)) for _ in range(size)]
+        matcher = WordMatcher(words)
+        loop = SubstringMatcher(words)
+        assert matcher.search(text) == loop.search(text)
+        naive = measure(lambda: loop.search(text), REPEAT)
+        automaton = measure(lambda: matcher.search(text), REPEAT)
+        rows.append((
+            size,
+            f'{naive * 1e6:.1f}',
+            f'{automaton * 1e6:.1f}',
+            f'{naive / automaton:.1f}x',
+        ))
+    print(f'Текст: {len(text)} символов, без совпадений.')
+    print_table(('слов', 'цикл, мкс', 'автомат, мкс', 'ускорение'), rows)
+
+
+if __name__ == '__main__':
+    main()
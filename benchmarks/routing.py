@@ -0,0 +1,150 @@
+"""
+Смешанная нагрузка чтения и записи до и после разделения баз.
+
+«До» — одно соединение на поток с журналом по умолчанию (DELETE), где
+каждая запись блокирует читателей. «После» — WAL, чтение через
+соединение только для чтения и закрепление пишущих клиентов за
+основной базой. Каждый режим работает на своей временной базе, а
+клиенты — отдельные процессы, чтобы конкурировать за базу, а не за GIL.
+Запуск из корня репозитория:
+
+    python benchmarks/routing.py --workers 8 --seconds 10
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+
+from common import print_table, setup_django
+
+MODES = {
+    'до': {'DATABASE_ROUTERS': [], 'SQLITE_PRAGMAS': {}},
+    'после': {},
+}
+NEWS_COUNT = 200
+
+
+def seed():
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='Автор')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст') for index in range(
+            NEWS_COUNT
+        )
+    )
+    news = list(News.objects.all())
+    Comment.objects.bulk_create(
+        Comment(news=item, author=author, text='Комментарий')
+        for item in news for _ in range(10)
+    )
+    return [item.pk for item in news]
+
+
+def setup(mode, database=None):
+    # Без кэша страниц каждое чтение доходит до базы.
+    return setup_django(
+        'ya_news', database,
+        NEWS_PAGE_CACHE_TIMEOUT=0,
+        DEBUG=False,
+        **MODES[mode],
+    )
+
+
+def worker(number, news_ids, write_share, seconds):
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    rng = random.Random(number)
+    reader = Client()
+    writer = Client()
+    writer.force_login(
+        get_user_model().objects.create(username=f'Читатель {number}')
+    )
+    reads = writes = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        url = reverse('news:detail', args=(rng.choice(news_ids),))
+        if rng.random() < write_share:
+            response = writer.post(url, {'text': 'Ещё комментарий'})
+            writes += 1
+        else:
+            response = reader.get(url)
+            reads += 1
+        errors += response.status_code >= 400
+    print(json.dumps([reads, writes, errors]))
+
+
+def command(args, *extra):
+    return [
+        sys.executable, __file__,
+        '--workers', str(args.workers),
+        '--seconds', str(args.seconds),
+        '--write-share', str(args.write_share),
+        *extra,
+    ]
+
+
+def run(args):
+    database = setup(args.mode)
+    news_ids = seed()
+    processes = [
+        subprocess.Popen(
+            command(
+                args, '--mode', args.mode, '--database', str(database),
+                '--worker', str(number),
+                '--news', ','.join(map(str, news_ids)),
+            ),
+            stdout=subprocess.PIPE, text=True,
+        )
+        for number in range(args.workers)
+    ]
+    results = [
+        json.loads(process.communicate()[0].splitlines()[-1])
+        for process in processes
+    ]
+    reads, writes, errors = map(sum, zip(*results))
+    print(json.dumps({'reads': reads, 'writes': writes, 'errors': errors}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-share', type=float, default=0.1)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--database')
+    parser.add_argument('--worker', type=int)
+    parser.add_argument('--news')
+    args = parser.parse_args()
+    if args.worker is not None:
+        setup(args.mode, args.database)
+        news_ids = [int(pk) for pk in args.news.split(',')]
+        worker(args.worker, news_ids, args.write_share, args.seconds)
+        return
+    if args.mode:
+        run(args)
+        return
+
+    rows = []
+    for mode in MODES:
+        output = subprocess.run(
+            command(args, '--mode', mode),
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        rows.append((
+            mode,
+            f'{result["reads"] / args.seconds:.0f}',
+            f'{result["writes"] / args.seconds:.0f}',
+            result['errors'],
+        ))
+    print_table(('режим', 'чтений/с', 'записей/с', 'ошибок'), rows)
+
+
+if __name__ == '__main__':
+    main()
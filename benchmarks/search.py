@@ -0,0 +1,91 @@
+"""
+Полнотекстовый поиск FTS5 против icontains на больших данных.
+
+Заполняет временную базу новостями (по умолчанию миллион строк) и
+сравнивает время первой страницы поиска для частых и редких слов.
+Запуск из корня репозитория:
+
+    python benchmarks/search.py --rows 1000000
+"""
+import argparse
+import itertools
+import random
+import time
+
+from common import measure, print_table, setup_django
+
+ALPHABET = 'абвгдежзиклмнопрстуфхцчшэюя'
+VOCABULARY_SIZE = 20_000
+WORDS_IN_TEXT = 30
+BATCH_SIZE = 10_000
+REPEAT = 5
+
+
+def seed(rows, vocabulary, rng):
+    from django.db import connection, transaction
+
+    cum_weights = list(itertools.accumulate(
+        1 / (rank + 1) for rank in range(len(vocabulary))
+    ))
+    started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, rows - offset)):
+                words = rng.choices(
+                    vocabulary, cum_weights=cum_weights, k=WORDS_IN_TEXT
+                )
+                batch.append((
+                    ' '.join(words[:3]).capitalize(),
+                    ' '.join(words),
+                    f'2022-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}',
+                ))
+            cursor.executemany(
+                'INSERT INTO news_news (title, text, date, comment_count) '
+                'VALUES (%s, %s, %s, 0)',
+                batch,
+            )
+    elapsed = time.perf_counter() - started
+    print(f'Заполнено {rows} новостей за {elapsed:.0f} с')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    setup_django('ya_news')
+    from django.db.models import Q
+    from news.models import News
+    from news.search import search_news
+
+    rng = random.Random(0)
+    vocabulary = list({
+        ''.join(rng.choices(ALPHABET, k=rng.randint(4, 9)))
+        for _ in range(VOCABULARY_SIZE)
+    })
+    seed(args.rows, vocabulary, rng)
+    queries = {
+        'частое слово': vocabulary[0],
+        'среднее слово': vocabulary[len(vocabulary) // 10],
+        'редкое слово': vocabulary[-1],
+        'нет в базе': 'щщщщщ',
+    }
+    rows = []
+    for label, word in queries.items():
+        fts = measure(lambda: search_news(word, 10), REPEAT)
+        naive = measure(
+            lambda: list(News.objects.filter(
+                Q(title__icontains=word) | Q(text__icontains=word)
+            )[:10]),
+            REPEAT,
+        )
+        rows.append((
+            label, f'{naive * 1000:.1f}', f'{fts * 1000:.2f}',
+            f'{naive / fts:.0f}x',
+        ))
+    print_table(('запрос', 'icontains, мс', 'FTS5, мс', 'ускорение'), rows)
+
+
+if __name__ == '__main__':
+    main()
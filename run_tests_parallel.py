@@ -0,0 +1,192 @@
+"""
+Параллельный запуск проверок обоих проектов.
+
+flake8, structure_test.py и тесты ya_news и ya_note запускаются
+одновременно. Тесты каждого проекта делятся на части по числу ядер,
+каждая часть идёт в своём процессе pytest со своей тестовой базой SQLite
+в памяти. Части составляются по длительностям прошлого запуска, чтобы
+заканчивались одновременно. В конце печатаются самые долгие тесты и
+время каждой части. Запуск из корня репозитория:
+
+    python run_tests_parallel.py --workers 4 --slowest 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+DURATIONS_FILE = Path(tempfile.gettempdir()) / 'django_testing-durations.json'
+PYTEST = (sys.executable, '-m', 'pytest', '-o', 'addopts=', '-p',
+          'no:cacheprovider')
+
+
+def project_env(project):
+    return {**os.environ, 'DJANGO_SETTINGS_MODULE': PROJECTS[project]}
+
+
+def collect(project):
+    """Идентификаторы тестов проекта в порядке pytest."""
+    output = subprocess.run(
+        [*PYTEST, '--collect-only', '-q'],
+        cwd=BASE_DIR / project, env=project_env(project),
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return [line for line in output.splitlines() if '::' in line]
+
+
+def split(tests, count, durations):
+    """
+    Делит тесты на count частей с близкой суммарной длительностью.
+
+    Самые долгие тесты раскладываются первыми в наименее занятую часть.
+    Для новых тестов берётся средняя длительность известных.
+    """
+    known = [durations[test] for test in tests if test in durations]
+    default = sum(known) / len(known) if known else 1.0
+    shards = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for test in sorted(
+        tests, key=lambda test: durations.get(test, default), reverse=True
+    ):
+        index = loads.index(min(loads))
+        shards[index].append(test)
+        loads[index] += durations.get(test, default)
+    return [shard for shard in shards if shard]
+
+
+class Job:
+    """Процесс проверки с именем и, для тестов, файлом отчёта JUnit."""
+
+    def __init__(self, name, command, cwd=BASE_DIR, env=None, report=None):
+        self.name = name
+        self.report = report
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            command, cwd=cwd, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        # Вывод читается в отдельном потоке, чтобы процесс не встал
+        # на полном буфере и время окончания было точным.
+        self.reader = threading.Thread(target=self.read)
+        self.reader.start()
+
+    def read(self):
+        self.output = self.process.stdout.read()
+        self.process.wait()
+        self.elapsed = time.perf_counter() - self.started
+
+    def wait(self):
+        self.reader.join()
+        return self.process.returncode
+
+
+def read_report(path, tests):
+    """
+    Длительности тестов части из отчёта JUnit: {node id: секунды}.
+
+    В отчёте путь к модулю записан от rootdir pytest, а не от каталога
+    проекта, поэтому тест ищется по совпадению конца идентификатора.
+    """
+    if not path.exists():
+        return {}
+    reported = {
+        f'{case.get("classname")}.{case.get("name")}': float(
+            case.get('time', 0)
+        )
+        for case in ElementTree.parse(path).iter('testcase')
+    }
+    timings = {}
+    for test in tests:
+        dotted = test.replace('.py::', '.').replace('::', '.')
+        dotted = dotted.replace('/', '.')
+        for name, seconds in reported.items():
+            if dotted.endswith(name):
+                timings[test] = seconds
+                break
+    return timings
+
+
+def load_durations():
+    try:
+        return json.loads(DURATIONS_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--slowest', type=int, default=15,
+                        help='Сколько самых долгих тестов показать.')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    jobs = [
+        Job('flake8', [sys.executable, '-m', 'flake8', '--config=setup.cfg']),
+        Job('structure_test', [sys.executable, 'structure_test.py']),
+    ]
+    collected = {project: collect(project) for project in PROJECTS}
+    total = sum(map(len, collected.values())) or 1
+    durations = load_durations()
+    reports = Path(tempfile.mkdtemp())
+    for project, tests in collected.items():
+        count = max(1, round(args.workers * len(tests) / total))
+        shards = split(
+            tests, count,
+            {test[len(project) + 1:]: seconds
+             for test, seconds in durations.items()
+             if test.startswith(f'{project}/')},
+        )
+        for index, shard in enumerate(shards, 1):
+            report = reports / f'{project}-{index}.xml'
+            jobs.append(Job(
+                f'{project} [{index}/{len(shards)}, тестов: {len(shard)}]',
+                [*PYTEST, '-q', f'--junitxml={report}', *shard],
+                cwd=BASE_DIR / project, env=project_env(project),
+                report=(project, report, shard),
+            ))
+
+    failed = [job for job in jobs if job.wait() != 0]
+    timings = {}
+    for job in jobs:
+        if job.report:
+            project, report, tests = job.report
+            timings.update(
+                (f'{project}/{test}', seconds)
+                for test, seconds in read_report(report, tests).items()
+            )
+    DURATIONS_FILE.write_text(json.dumps({**durations, **timings}))
+
+    for job in failed:
+        print(f'===== {job.name}: ошибка =====')
+        print(job.output)
+    print('Самые долгие тесты:')
+    for test, seconds in sorted(
+        timings.items(), key=lambda item: item[1], reverse=True
+    )[:args.slowest]:
+        print(f'{seconds:8.3f} с  {test}')
+    print('Части:')
+    for job in jobs:
+        print(f'{job.elapsed:8.2f} с  {job.name}')
+    wall = time.perf_counter() - started
+    print(
+        f'Тестов: {len(timings)}, сумма времени тестов '
+        f'{sum(timings.values()):.1f} с, общее время {wall:.1f} с'
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,107 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.forms.models import BaseInlineFormSet
+from django.http import Http404
+from django.urls import NoReverseMatch, reverse
+from django.utils.text import Truncator
 
-from .models import Comment, News
+from .models import BadWord, Comment, News
+from .pagination import CursorPaginator, InvalidCursor
 
 
-class CommentInline(admin.StackedInline):
+class LoadedRawIdWidget(ForeignKeyRawIdWidget):
+    """
+    Поле raw_id, подпись которого берётся из уже загруженного объекта.
+
+    Стандартный виджет читает связанный объект отдельным запросом
+    в каждой строке inline. Если объект передан в loaded, запроса нет.
+    """
+    loaded = None
+
+    def label_and_url_for_value(self, value):
+        obj = self.loaded
+        if obj is None or str(obj.pk) != str(value):
+            return super().label_and_url_for_value(value)
+        try:
+            url = reverse(
+                f'{self.admin_site.name}:{obj._meta.app_label}_'
+                f'{obj._meta.model_name}_change',
+                args=(obj.pk,),
+            )
+        except NoReverseMatch:
+            url = ''
+        return Truncator(obj).words(14), url
+
+
+class CommentPageFormSet(BaseInlineFormSet):
+    """
+    Одна страница комментариев новости, от новых к старым.
+
+    Страница выбирается параметрами after и before адреса, поэтому
+    при сохранении формы обрабатываются те же комментарии, что были
+    показаны.
+    """
+    after = before = None
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            paginator = CursorPaginator(
+                self.queryset,
+                ('-created', '-id'),
+                settings.COMMENTS_COUNT_ON_ADMIN_PAGE,
+            )
+            try:
+                self.page = paginator.get_page(
+                    after=self.after, before=self.before
+                )
+            except InvalidCursor:
+                raise Http404('Некорректный курсор.')
+        return self.page.object_list
+
+    def add_fields(self, form, index):
+        """Подпись автора из комментария, загруженного с select_related."""
+        super().add_fields(form, index)
+        widget = form.fields['author'].widget
+        if form.instance.pk and isinstance(widget, LoadedRawIdWidget):
+            widget.loaded = form.instance.author
+
+
+class CommentInline(admin.TabularInline):
     model = Comment
+    formset = CommentPageFormSet
+    template = 'admin/news/comment_inline.html'
+    raw_id_fields = ('author',)
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'author':
+            kwargs['widget'] = LoadedRawIdWidget(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.after = request.GET.get('after')
+        formset.before = request.GET.get('before')
+        return formset
+
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('comment_count',)
+    show_full_result_count = False
     inlines = [
         CommentInline,
     ]
+
+
+@admin.register(BadWord)
+class BadWordAdmin(admin.ModelAdmin):
+    search_fields = ('word',)
@@ -0,0 +1,124 @@
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .models import Comment, News
+from .pagination import CursorPaginator, InvalidCursor
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+LIST_FIELDS = ('id', 'title', 'date', 'comment_count')
+COMMENT_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+STREAM_BATCH_SIZE = 500
+
+
+class InvalidFields(Exception):
+    """В ?fields= есть неизвестные поля."""
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def select_fields(request, available, default):
+    """Поля из параметра ?fields=title,date или поля по умолчанию."""
+    raw = request.GET.get('fields')
+    if raw is None:
+        return default
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()
+    ))
+    unknown = set(fields) - set(available)
+    if not fields or unknown:
+        raise InvalidFields(
+            f'Доступные поля: {", ".join(available)}.'
+        )
+    return fields
+
+
+@require_GET
+def news_list(request):
+    """
+    Лента новостей в JSON, страницами по курсору.
+
+    Строки читаются через values() без создания моделей. Поля сортировки
+    выбираются всегда — они нужны для курсора, — но в ответ попадают
+    только запрошенные.
+    """
+    try:
+        fields = select_fields(request, NEWS_FIELDS, LIST_FIELDS)
+    except InvalidFields as exc:
+        return error(str(exc), HTTPStatus.BAD_REQUEST)
+    paginator = CursorPaginator(
+        News.objects.values(*dict.fromkeys((*fields, 'date', 'id'))),
+        ('-date', '-id'),
+        settings.NEWS_COUNT_ON_HOME_PAGE,
+    )
+    try:
+        page = paginator.get_page(
+            after=request.GET.get('after'), before=request.GET.get('before')
+        )
+    except InvalidCursor:
+        return error('Неверный курсор страницы.', HTTPStatus.BAD_REQUEST)
+    return JsonResponse({
+        'results': [{name: row[name] for name in fields} for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def stream_comments(news, news_id):
+    """Дописывает к новости массив комментариев, не держа его в памяти."""
+    head = json.dumps(news, cls=DjangoJSONEncoder, ensure_ascii=False)
+    yield head[:-1] + (', ' if news else '') + '"comments": ['
+    rows = Comment.objects.filter(news_id=news_id).order_by(
+        'created', 'id'
+    ).values_list(*COMMENT_FIELDS.values()).iterator(STREAM_BATCH_SIZE)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    separator = ''
+    batch = []
+    for row in rows:
+        comment = dict(zip(COMMENT_FIELDS, row))
+        batch.append(separator + encoder.encode(comment))
+        separator = ', '
+        if len(batch) == STREAM_BATCH_SIZE:
+            yield ''.join(batch)
+            batch = []
+    yield ''.join(batch) + ']}'
+
+
+@require_GET
+def news_detail(request, pk):
+    """
+    Новость в JSON вместе с комментариями.
+
+    Комментарии отдаются потоково пачками по STREAM_BATCH_SIZE, поэтому
+    обсуждение любого размера не собирается в памяти целиком. Без
+    comments в ?fields= ответ обходится одним запросом.
+    """
+    try:
+        fields = select_fields(
+            request, (*NEWS_FIELDS, 'comments'), (*NEWS_FIELDS, 'comments')
+        )
+    except InvalidFields as exc:
+        return error(str(exc), HTTPStatus.BAD_REQUEST)
+    news_fields = [name for name in fields if name != 'comments']
+    news = News.objects.filter(pk=pk).values(
+        *news_fields or ['id']
+    ).first()
+    if news is None:
+        return error('Новость не найдена.', HTTPStatus.NOT_FOUND)
+    news = {name: news[name] for name in news_fields}
+    if 'comments' not in fields:
+        return JsonResponse(news)
+    return StreamingHttpResponse(
+        stream_comments(news, pk), content_type='application/json'
+    )
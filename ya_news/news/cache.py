@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, quote_etag
+
+LIST_VERSION_KEY = 'news:version:list'
+
+
+def detail_version_key(news_id):
+    return f'news:version:detail:{news_id}'
+
+
+def comments_version_key(news_id):
+    """Версия списка комментариев новости для кэша фрагментов."""
+    return f'news:version:comments:{news_id}'
+
+
+def get_versions(*keys):
+    """
+    Возвращает текущие версии данных для ключей.
+
+    Отсутствующая в кэше версия создаётся заново из текущего времени,
+    поэтому после вытеснения ключа старые страницы не станут актуальными.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*keys):
+    """Делает устаревшими все страницы, построенные по этим версиям."""
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+class CachedPageMixin:
+    """
+    Кэширование страницы для анонимных посетителей.
+
+    Ключ кэша включает версии данных из get_version_keys(), поэтому
+    страница сбрасывается сигналами сразу после изменения новостей или
+    комментариев. Авторизованным пользователям страница всегда строится
+    заново: в ней есть форма с CSRF-токеном и личные ссылки.
+
+    Анонимные ответы снабжаются ETag из версий и get_validators().
+    Если клиент уже видел эту версию, отдаётся 304 без построения
+    страницы, а для закэшированной страницы — и без запросов к базе.
+    Last-Modified не отдаётся: правка новости или комментария не
+    меняет их дат, и клиент с If-Modified-Since получил бы 304
+    на устаревшую страницу.
+    """
+
+    def get_version_keys(self):
+        raise NotImplementedError
+
+    def get_validators(self):
+        """
+        Данные, от которых зависит страница, для ETag.
+
+        Должен обходиться одним запросом. Возвращает None,
+        если страницы нет.
+        """
+        raise NotImplementedError
+
+    def get_page_cache_key(self):
+        versions = '.'.join(map(str, get_versions(*self.get_version_keys())))
+        path = hashlib.md5(
+            self.request.get_full_path().encode()
+        ).hexdigest()
+        return f'news:page:{type(self).__name__}:{versions}:{path}'
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        response = cache.get(key)
+        if response is not None:
+            return get_conditional_response(
+                request, etag=response.get('ETag'), response=response
+            )
+        data = self.get_validators()
+        if data is None:
+            return super().get(request, *args, **kwargs)
+        etag = quote_etag(hashlib.md5(f'{key}:{data}'.encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key, rendered, settings.NEWS_PAGE_CACHE_TIMEOUT
+                )
+            )
+        return response
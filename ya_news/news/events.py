@@ -0,0 +1,154 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Comment
+
+
+class Broker:
+    """
+    Рассылка событий подписчикам внутри процесса.
+
+    Подписчик — очередь asyncio в цикле событий, где она создана.
+    Публиковать можно из любого потока: сообщение передаётся в цикл
+    подписчика через call_soon_threadsafe. Медленный подписчик с полной
+    очередью пропускает сообщения, а не тормозит остальных.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Вызывается из цикла событий подписчика."""
+        queue = asyncio.Queue(self.maxsize)
+        queue.loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            self._subscribers[channel].discard(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    def subscribers(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel, message):
+        with self._lock:
+            queues = list(self._subscribers.get(channel, ()))
+        for queue in queues:
+            queue.loop.call_soon_threadsafe(self._deliver, queue, message)
+
+    @staticmethod
+    def _deliver(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+
+broker = Broker()
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': str(comment.author),
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def publish_comment(comment):
+    broker.publish(comment.news_id, serialize_comment(comment))
+
+
+def format_event(message):
+    data = json.dumps(message, ensure_ascii=False)
+    return f'id: {message["id"]}\nevent: comment\ndata: {data}\n\n'.encode()
+
+
+@sync_to_async
+def missed_comments(news_id, last_id):
+    comments = Comment.objects.filter(
+        news_id=news_id, pk__gt=last_id
+    ).select_related('author').order_by('pk')
+    return [serialize_comment(comment) for comment in comments]
+
+
+def last_event_id(scope):
+    for name, value in scope['headers']:
+        if name == b'last-event-id' and value.isdigit():
+            return int(value)
+    return None
+
+
+async def send_chunk(send, body):
+    await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+
+async def wait_disconnect(receive):
+    """
+    Ждёт отключения клиента.
+
+    Сервер сначала отдаёт тело запроса сообщениями http.request,
+    их нужно дочитать и пропустить.
+    """
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_comments(scope, receive, send, news_id):
+    """
+    ASGI-приложение: поток server-sent events с новыми комментариями.
+
+    Пока комментариев нет, соединение не обращается к базе и только раз
+    в NEWS_EVENTS_KEEPALIVE секунд шлёт комментарий-пинг. Переподключение
+    с Last-Event-ID досылает пропущенное одним запросом.
+    """
+    queue = broker.subscribe(news_id)
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send_chunk(send, b'retry: 5000\n\n')
+        last_id = last_event_id(scope)
+        if last_id is not None:
+            for message in await missed_comments(news_id, last_id):
+                await send_chunk(send, format_event(message))
+        while True:
+            message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnect},
+                timeout=settings.NEWS_EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if message not in done:
+                message.cancel()
+            if disconnect in done:
+                break
+            await send_chunk(
+                send,
+                format_event(message.result()) if message in done
+                else b': keepalive\n\n',
+            )
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        broker.unsubscribe(news_id, queue)
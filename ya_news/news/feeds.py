@@ -0,0 +1,78 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from .models import News
+
+
+def build_feed():
+    """Atom-лента из NEWS_FEED_SIZE самых свежих новостей."""
+    site = settings.NEWS_FEED_SITE_URL.rstrip('/')
+    feed = Atom1Feed(
+        title='YaNews',
+        link=site + reverse('news:home'),
+        description='Свежие новости',
+        feed_url=site + reverse('news:feed'),
+        language=settings.LANGUAGE_CODE,
+    )
+    latest = News.objects.only('id', 'title', 'text', 'date')
+    for news in latest[:settings.NEWS_FEED_SIZE]:
+        link = site + reverse('news:detail', args=(news.pk,))
+        feed.add_item(
+            title=news.title,
+            link=link,
+            unique_id=link,
+            description=news.text,
+            pubdate=news.date,
+        )
+    return feed
+
+
+def write_feed():
+    """
+    Пересобирает файл ленты.
+
+    Файл заменяется атомарно, поэтому читатели никогда не получат
+    недописанную ленту.
+    """
+    path = Path(settings.NEWS_FEED_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        'wb', dir=path.parent, delete=False
+    ) as file:
+        build_feed().write(file, 'utf-8')
+    os.replace(file.name, path)
+
+
+@require_GET
+def news_feed(request):
+    """
+    Отдаёт заранее собранную ленту без запросов к базе.
+
+    ETag и Last-Modified берутся из метаданных файла, поэтому ответ
+    304 не требует даже чтения ленты.
+    """
+    path = Path(settings.NEWS_FEED_PATH)
+    if not path.exists():
+        write_feed()
+    stat = path.stat()
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = FileResponse(
+            path.open('rb'), content_type=Atom1Feed.content_type
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
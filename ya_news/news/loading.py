@@ -0,0 +1,66 @@
+"""
+Массовая загрузка новостей и комментариев в обход save().
+
+bulk_create не вызывает save() и не отправляет сигналы, поэтому
+счётчики комментариев и версии кэша после него обновляются здесь.
+Функции общие для команд загрузки и тестовых фабрик.
+"""
+from contextlib import contextmanager
+
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .cache import (
+    LIST_VERSION_KEY, bump_versions, comments_version_key, detail_version_key
+)
+from .models import Comment, News
+
+
+@contextmanager
+def raw_timestamps(models):
+    """
+    Сохраняет переданные даты вместо auto_now/auto_now_add.
+
+    bulk_create, в отличие от loaddata, иначе перезаписал бы их текущим
+    временем. Если даты нет, подставляется текущее время.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def recount_comments(news_ids=None):
+    """
+    Пересчитывает comment_count одним UPDATE.
+
+    Без news_ids пересчитываются все новости. Возвращает число
+    обновлённых новостей.
+    """
+    comment_count = Comment.objects.filter(
+        news=OuterRef('pk')
+    ).order_by().values('news').annotate(
+        total=Count('pk')
+    ).values('total')
+    news = News.objects.all()
+    if news_ids is not None:
+        news = news.filter(pk__in=news_ids)
+    return news.update(comment_count=Coalesce(Subquery(comment_count), 0))
+
+
+def bump_news_versions(news_ids):
+    """Сбрасывает кэш ленты, страниц и комментариев новостей news_ids."""
+    bump_versions(
+        LIST_VERSION_KEY,
+        *map(detail_version_key, news_ids),
+        *map(comments_version_key, news_ids),
+    )
@@ -0,0 +1,205 @@
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from news.cache import LIST_VERSION_KEY, bump_versions
+from news.feeds import write_feed
+from news.loading import raw_timestamps
+from news.models import Comment, News
+
+# Сколько имён пользователей проверять на занятость одним запросом.
+USERNAMES_CHECK_SIZE = 500
+
+SYLLABLES = (
+    'ка', 'ро', 'ми', 'на', 'ло', 'те', 'ст', 'ва', 'пр', 'ни', 'до', 'ре',
+    'ль', 'ко', 'за', 'бы', 'ти', 'ос', 'ен', 'ра', 'ма', 'по', 'су', 'жи',
+)
+
+
+def free_usernames(user_model, count):
+    """
+    Имена вида user<N>, которых ещё нет в базе, count штук.
+
+    Номера начинаются после наибольшего id пользователя, но такое имя
+    могло быть создано раньше, поэтому занятые имена пропускаются.
+    """
+    number = user_model.objects.aggregate(last=Max('pk'))['last'] or 0
+    while count > 0:
+        candidates = [
+            f'user{number + index}'
+            for index in range(1, min(count, USERNAMES_CHECK_SIZE) + 1)
+        ]
+        number += len(candidates)
+        taken = set(user_model.objects.filter(
+            username__in=candidates
+        ).values_list('username', flat=True))
+        for name in candidates:
+            if name not in taken:
+                count -= 1
+                yield name
+
+
+def make_vocabulary(rng, size):
+    return list({
+        ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 5)))
+        for _ in range(size)
+    })
+
+
+class TextGenerator:
+    """
+    Тексты с частотами слов по закону Ципфа и длиной с длинным хвостом.
+
+    Длина в словах берётся из логнормального распределения, поэтому
+    большинство текстов короткие, но встречаются и очень длинные.
+    """
+
+    def __init__(self, rng, vocabulary_size=5000):
+        self.rng = rng
+        self.words = make_vocabulary(rng, vocabulary_size)
+        self.cum_weights = list(accumulate(
+            1 / rank for rank in range(1, len(self.words) + 1)
+        ))
+
+    def words_count(self, median, sigma):
+        return max(1, int(self.rng.lognormvariate(0, sigma) * median))
+
+    def text(self, median, sigma=0.8):
+        return ' '.join(self.rng.choices(
+            self.words, cum_weights=self.cum_weights,
+            k=self.words_count(median, sigma),
+        ))
+
+    def title(self, max_length):
+        return self.text(5, 0.3)[:max_length].rstrip().capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, новости и комментарии пакетами '
+        'bulk_create. Число комментариев у новостей распределено '
+        'по Парето: немногие новости собирают большую часть обсуждений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней назад распределить даты новостей.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.2,
+            help='Параметр Парето: чем меньше, тем сильнее перекос.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк в одном INSERT и одной транзакции.'
+        )
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.texts = TextGenerator(self.rng)
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+        user_ids = self.create_users(options['users'])
+        news = self.create_news(options['news'], options['days'])
+        self.create_comments(
+            options['comments'], news, user_ids, options['skew']
+        )
+        call_command('recount_comments', stdout=self.stdout)
+        bump_versions(LIST_VERSION_KEY)
+        write_feed()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'
+        ))
+
+    def insert(self, model, rows, total):
+        """Вставляет строки из генератора пакетами и печатает скорость."""
+        started = time.perf_counter()
+        inserted = 0
+        while inserted < total:
+            batch = [
+                next(rows)
+                for _ in range(min(self.batch_size, total - inserted))
+            ]
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            inserted += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{model.__name__}: {inserted}/{total}, '
+                f'{inserted / elapsed:.0f} строк/с'
+            )
+
+    def new_ids(self, model, rows, total):
+        """Вставляет строки и возвращает их id по порядку вставки."""
+        last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        self.insert(model, rows, total)
+        return list(
+            model.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def create_users(self, count):
+        user_model = get_user_model()
+        password = make_password(None)
+        rows = (
+            user_model(username=name, password=password)
+            for name in free_usernames(user_model, count)
+        )
+        return self.new_ids(user_model, rows, count)
+
+    def create_news(self, count, days):
+        today = timezone.localdate()
+        title_length = News._meta.get_field('title').max_length
+        dates = [
+            today - timedelta(days=self.rng.randrange(days))
+            for _ in range(count)
+        ]
+        rows = (
+            News(
+                title=self.texts.title(title_length),
+                text=self.texts.text(150),
+                date=news_date,
+            )
+            for news_date in dates
+        )
+        return list(zip(self.new_ids(News, rows, count), dates))
+
+    def create_comments(self, count, news, user_ids, skew):
+        if not news or not user_ids:
+            return
+        cum_weights = list(accumulate(
+            self.rng.paretovariate(skew) for _ in news
+        ))
+        rng = self.rng
+
+        def rows():
+            for _ in range(count):
+                news_id, news_date = rng.choices(
+                    news, cum_weights=cum_weights
+                )[0]
+                created = timezone.make_aware(
+                    datetime.combine(news_date, dt_time())
+                ) + timedelta(hours=rng.expovariate(1 / 12))
+                yield Comment(
+                    news_id=news_id,
+                    author_id=rng.choice(user_ids),
+                    text=self.texts.text(20, 1.0),
+                    created=created,
+                )
+
+        with raw_timestamps({Comment}):
+            self.insert(Comment, rows(), count)
@@ -0,0 +1,223 @@
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from news.feeds import write_feed
+from news.loading import bump_news_versions, raw_timestamps, recount_comments
+from news.models import Comment
+
+READ_SIZE = 1 << 16
+# Самый длинный обрывок, который raw_decode ещё может принять за
+# начало значения: «\\uXXXX», «false», «1.5e-».
+PARTIAL_TOKEN_SIZE = 6
+
+
+def read_array_start(stream):
+    """Пропускает всё до «[» и возвращает прочитанный остаток."""
+    buffer = ''
+    while not buffer.strip():
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            raise CommandError('Ожидался JSON-массив объектов.')
+        buffer += chunk
+    buffer = buffer.lstrip()
+    if buffer[0] != '[':
+        raise CommandError('Ожидался JSON-массив объектов.')
+    return buffer[1:]
+
+
+def is_truncated(buffer, error):
+    """
+    Может ли ошибка разбора исчезнуть, если дочитать файл.
+
+    Обрыв куска даёт ошибку у самого конца буфера или незакрытую
+    строку; ошибка раньше значит, что объект испорчен.
+    """
+    return (
+        error.msg.startswith('Unterminated string')
+        or len(buffer) - error.pos <= PARTIAL_TOKEN_SIZE
+    )
+
+
+def iter_json_array(stream):
+    """
+    Потоково разбирает JSON-массив объектов.
+
+    В памяти держится только текущий кусок файла, а не весь массив.
+    На первом испорченном объекте разбор прерывается, не дочитывая
+    файл до конца.
+    """
+    decoder = json.JSONDecoder()
+    buffer = read_array_start(stream)
+    position = 0
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer):
+            if buffer[position] == ']':
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                if eof:
+                    raise CommandError('Файл обрывается посреди объекта.')
+                if not is_truncated(buffer, error):
+                    raise CommandError(f'Некорректный JSON: {error}.')
+            else:
+                yield obj
+                continue
+        elif eof:
+            raise CommandError('Файл обрывается до конца массива.')
+        chunk = stream.read(READ_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_ndjson(stream):
+    """Разбирает файл, в каждой строке которого один JSON-объект."""
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise CommandError(f'Строка {number}: {error}.')
+
+
+def detect_format(stream):
+    """Массив начинается с «[», NDJSON — сразу с объекта."""
+    while True:
+        char = stream.read(1)
+        if not char or not char.isspace():
+            break
+    return char, 'json' if char == '[' else 'ndjson'
+
+
+class PrefixedStream:
+    """Возвращает уже прочитанное начало потока перед остальными данными."""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        prefix, self.prefix = self.prefix, ''
+        if size < 0:
+            return prefix + self.stream.read()
+        return prefix + self.stream.read(max(size - len(prefix), 0))
+
+    def __iter__(self):
+        prefix, self.prefix = self.prefix, ''
+        lines = iter(self.stream)
+        yield prefix + next(lines, '')
+        yield from lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости и комментарии из JSON или NDJSON '
+        'в формате фикстур Django пакетами через bulk_create. В отличие '
+        'от loaddata, объекты только добавляются: pk, который уже есть '
+        'в базе, прерывает загрузку, а пакеты до него остаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к файлу или «-» для стандартного ввода.'
+        )
+        parser.add_argument(
+            '--format', choices=('auto', 'json', 'ndjson'), default='auto'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=20000,
+            help='Строк в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            self.load(sys.stdin, options)
+            return
+        with open(options['path'], encoding='utf-8') as stream:
+            self.load(stream, options)
+
+    def load(self, stream, options):
+        file_format = options['format']
+        if file_format == 'auto':
+            prefix, file_format = detect_format(stream)
+            stream = PrefixedStream(prefix, stream)
+        records = (
+            iter_json_array(stream) if file_format == 'json'
+            else iter_ndjson(stream)
+        )
+        objects = serializers.deserialize('python', records)
+        total = 0
+        touched_news = set()
+        started = time.perf_counter()
+        try:
+            with raw_timestamps({Comment}) as timestamp_fields:
+                while True:
+                    chunk = [
+                        deserialized.object for deserialized in
+                        islice(objects, options['chunk_size'])
+                    ]
+                    if not chunk:
+                        break
+                    with transaction.atomic():
+                        self.insert(
+                            chunk, options['batch_size'], timestamp_fields
+                        )
+                    touched_news.update(
+                        obj.news_id for obj in chunk
+                        if isinstance(obj, Comment)
+                    )
+                    total += len(chunk)
+                    self.report(total, started)
+        except IntegrityError as error:
+            raise CommandError(
+                f'Загружено строк: {total}, следующий пакет отклонён: '
+                f'{error}. load_news не обновляет существующие объекты, '
+                'для этого есть loaddata.'
+            )
+        finally:
+            self.finish(touched_news)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total}'
+        ))
+
+    def finish(self, touched_news):
+        """Пересчитывает счётчики и сбрасывает кэш загруженных новостей."""
+        recount_comments(touched_news)
+        bump_news_versions(touched_news)
+        # bulk_create не отправляет сигналы, ленту пересобираем сами.
+        write_feed()
+
+    def insert(self, chunk, batch_size, timestamp_fields):
+        by_model = {}
+        now = timezone.now()
+        for obj in chunk:
+            by_model.setdefault(type(obj), []).append(obj)
+            for field in timestamp_fields:
+                if (
+                    isinstance(obj, field.model)
+                    and getattr(obj, field.attname) is None
+                ):
+                    setattr(obj, field.attname, now)
+        for model, objs in by_model.items():
+            model.objects.bulk_create(objs, batch_size=batch_size)
+
+    def report(self, total, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{total} строк, {total / elapsed:.0f} строк/с'
+        )
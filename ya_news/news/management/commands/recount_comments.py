@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from news.loading import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчик комментариев у всех новостей.'
+
+    def handle(self, *args, **options):
+        updated = recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано новостей: {updated}')
+        )
@@ -0,0 +1,96 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .routers import use_primary
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """Считает SQL-запросы и суммарное время их выполнения."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class QueryBudgetMiddleware:
+    """
+    Учёт SQL-запросов для каждого маршрута.
+
+    Число запросов и их время сохраняются в атрибутах ответа
+    query_count и query_time, в режиме DEBUG ещё и в заголовках.
+    Превышение бюджета из QUERY_BUDGETS пишется в лог.
+    Middleware должен стоять первым, чтобы учесть запросы сессий
+    и аутентификации.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        response.query_count = recorder.count
+        response.query_time = recorder.duration
+        if settings.DEBUG:
+            response['X-Query-Count'] = recorder.count
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f}'
+            )
+        match = request.resolver_match
+        if match is None:
+            return response
+        budget = settings.QUERY_BUDGETS.get(match.view_name)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                'Маршрут %s выполнил %d SQL-запросов при бюджете %d '
+                '(%.1f мс)',
+                match.view_name, recorder.count, budget,
+                recorder.duration * 1000,
+            )
+        return response
+
+
+class ReadWriteRoutingMiddleware:
+    """
+    Закрепляет запросы пользователя за основной базой после записи.
+
+    Небезопасные методы (POST и другие) целиком работают с основной базой.
+    После успешной записи клиент получает cookie, и следующие
+    DATABASE_PIN_SECONDS секунд его чтение тоже идёт в основную базу,
+    поэтому свежий комментарий виден сразу после редиректа.
+    """
+    cookie_name = 'db_pin'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in self.safe_methods
+        with use_primary(writes or self.cookie_name in request.COOKIES):
+            response = self.get_response(request)
+        if writes and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.DATABASE_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
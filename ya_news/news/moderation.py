@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import BadWord
+
+# С какого числа слов автомат быстрее цикла по словам: поиск подстроки
+# выполняется в C, а автомат проходит текст по символу в Python.
+# Граница измерена benchmarks/profanity.py.
+AUTOMATON_MIN_WORDS = 300
+
+
+class SubstringMatcher:
+    """
+    Поиск каждого слова отдельно без учёта регистра.
+
+    Для короткого списка слов это быстрее автомата.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(dict.fromkeys(
+            word.lower() for word in words if word
+        ))
+
+    def search(self, text):
+        text = text.lower()
+        for word in self.words:
+            if word in text:
+                return True
+        return False
+
+
+def make_matcher(words):
+    """Цикл по словам для короткого списка, автомат — для длинного."""
+    words = list(words)
+    if len(words) < AUTOMATON_MIN_WORDS:
+        return SubstringMatcher(words)
+    return WordMatcher(words)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска запрещённых слов.
+
+    Строится один раз по списку слов и проверяет текст за один проход
+    независимо от длины списка. Слова и текст сравниваются без учёта
+    регистра.
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for word in words:
+            self._add(word.lower())
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.terminal.append(False)
+            state = next_state
+        self.terminal[state] = True
+
+    def _link(self):
+        """Строит суффиксные ссылки обходом бора в ширину."""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.terminal[self.fail[next_state]]:
+                    self.terminal[next_state] = True
+
+    def __len__(self):
+        return len(self.goto)
+
+    def search(self, text):
+        """Проверяет, содержит ли текст хотя бы одно из слов."""
+        goto, fail, terminal = self.goto, self.fail, self.terminal
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+class ReloadingMatcher:
+    """
+    Поиск слов, который перестраивается при изменении списка.
+
+    Помимо встроенного списка слова берутся из файла BAD_WORDS_FILE
+    (по одному в строке, строки с # пропускаются) и, если включено
+    BAD_WORDS_FROM_DB, из модели BadWord. Источники проверяются не чаще
+    раза в BAD_WORDS_RELOAD_INTERVAL секунд, поэтому новые слова
+    подхватываются без перезапуска процессов.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self._matcher = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if (
+            self._matcher is not None
+            and now - self._checked_at < settings.BAD_WORDS_RELOAD_INTERVAL
+        ):
+            return self._matcher
+        with self._lock:
+            signature = self._signature_of_sources()
+            if self._matcher is None or signature != self._signature:
+                self._matcher = make_matcher(self._load_words())
+                self._signature = signature
+            self._checked_at = now
+        return self._matcher
+
+    def search(self, text):
+        return self.get().search(text)
+
+    def _signature_of_sources(self):
+        signature = [settings.BAD_WORDS_FILE, settings.BAD_WORDS_FROM_DB]
+        if settings.BAD_WORDS_FILE:
+            try:
+                stat = os.stat(settings.BAD_WORDS_FILE)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        if settings.BAD_WORDS_FROM_DB:
+            signature.append(tuple(
+                BadWord.objects.aggregate(Count('pk'), Max('updated')).values()
+            ))
+        return signature
+
+    def _load_words(self):
+        words = list(self.words)
+        if settings.BAD_WORDS_FILE:
+            try:
+                with open(settings.BAD_WORDS_FILE, encoding='utf-8') as file:
+                    words.extend(
+                        line.strip() for line in file
+                        if line.strip() and not line.startswith('#')
+                    )
+            except FileNotFoundError:
+                pass
+        if settings.BAD_WORDS_FROM_DB:
+            words.extend(BadWord.objects.values_list('word', flat=True))
+        return words
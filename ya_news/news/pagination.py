@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from datetime import date
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+
+class InvalidCursor(Exception):
+    """Курсор повреждён или не соответствует сортировке."""
+
+
+def encode_cursor(values):
+    """Упаковывает значения полей сортировки в непрозрачную строку."""
+    values = [
+        value.isoformat() if isinstance(value, date) else value
+        for value in values
+    ]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Распаковывает список из length значений, записанный encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    return values
+
+
+class CursorPage:
+    """Страница, полученная по курсору."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Постраничный вывод по курсору (keyset pagination).
+
+    Вместо OFFSET страница выбирается условием на значения полей
+    сортировки последней показанной записи, поэтому стоимость любой
+    страницы одинакова при наличии индекса по этим полям. Последним
+    полем сортировки должен быть уникальный ключ, иначе записи
+    с одинаковыми значениями могут потеряться между страницами.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering
+        ]
+
+    def encode_cursor(self, obj):
+        return encode_cursor([
+            obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            for name, _ in self.fields
+        ])
+
+    def decode_cursor(self, cursor):
+        values = decode_cursor(cursor, len(self.fields))
+        opts = self.queryset.model._meta
+        try:
+            return [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (TypeError, ValidationError):
+            raise InvalidCursor(cursor)
+
+    def _seek(self, values, backwards):
+        """
+        Условие «строго после курсора» в порядке сортировки.
+
+        Дополнительное нестрогое условие на первое поле позволяет
+        планировщику начать чтение индекса сразу с нужного места.
+        """
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        name, descending = self.fields[0]
+        bound = 'lte' if descending != backwards else 'gte'
+        return Q(**{f'{name}__{bound}': values[0]}) & condition
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before."""
+        limit = self.per_page + 1
+        if before:
+            reverse_ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+            items = list(
+                self.queryset.filter(
+                    self._seek(self.decode_cursor(before), backwards=True)
+                ).order_by(*reverse_ordering)[:limit]
+            )
+            has_previous = len(items) > self.per_page
+            items = items[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset.order_by(*self.ordering)
+            if after:
+                queryset = queryset.filter(
+                    self._seek(self.decode_cursor(after), backwards=False)
+                )
+            items = list(queryset[:limit])
+            has_next = len(items) > self.per_page
+            items = items[:self.per_page]
+            has_previous = bool(after)
+        if not items:
+            return CursorPage(items)
+        return CursorPage(
+            items,
+            next_cursor=self.encode_cursor(items[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor(items[0]) if has_previous else None
+            ),
+        )
+
+
+class CursorPaginationMixin:
+    """Примесь для представлений со страницами по курсору."""
+    cursor_ordering = None
+
+    def paginate_by_cursor(self, queryset, per_page, lazy=False):
+        """
+        Страница по параметрам after и before запроса.
+
+        С lazy=True курсор проверяется сразу, а запрос к базе
+        откладывается до первого обращения к странице, например внутри
+        закэшированного фрагмента шаблона.
+        """
+        paginator = CursorPaginator(queryset, self.cursor_ordering, per_page)
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        try:
+            for cursor in (after, before):
+                if cursor:
+                    paginator.decode_cursor(cursor)
+            if not lazy:
+                return paginator.get_page(after=after, before=before)
+        except InvalidCursor:
+            raise Http404('Неверный курсор страницы.')
+        return SimpleLazyObject(
+            partial(paginator.get_page, after=after, before=before)
+        )
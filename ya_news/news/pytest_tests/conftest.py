@@ -1,25 +1,54 @@
-from datetime import timedelta
-
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.test.client import Client
 from django.urls import reverse
-from django.utils import timezone
 
 from news.models import Comment, News
 
+from .factories import make_comments, make_news, make_users
+
 
 QUANTITY_NEWS = settings.NEWS_COUNT_ON_HOME_PAGE
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Страницы и версии из кэша не переходят между тестами."""
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def read_from_primary(settings):
+    """
+    Тесты читают из основной базы.
+
+    Тестовая реплика — зеркало основной базы, но отдельное соединение
+    не видит данных из незавершённой транзакции теста.
+    """
+    settings.DATABASE_READ_REPLICA = None
+
+
+@pytest.fixture(autouse=True)
+def feed_path(settings, tmp_path):
+    """Лента собирается во временный каталог, а не в проект."""
+    settings.NEWS_FEED_PATH = tmp_path / 'news.atom'
+    return settings.NEWS_FEED_PATH
+
+
 @pytest.fixture
-def author(django_user_model):
-    return django_user_model.objects.create(username='Автор')
+def users():
+    return make_users(('Автор', 'Пользователь'))
 
 
 @pytest.fixture
-def not_author(django_user_model):
-    return django_user_model.objects.create(username='Пользователь')
+def author(users):
+    return users[0]
+
+
+@pytest.fixture
+def not_author(users):
+    return users[1]
 
 
 def login_user_client(user):
@@ -59,27 +88,12 @@ def comment(news, author):
 
 @pytest.fixture
 def several_news():
-    all_news = [
-        News(
-            title=f'Заголовок {i}',
-            text=f'Новость {i}',
-            date=timezone.now() - timedelta(days=i)
-        )
-        for i in range(QUANTITY_NEWS + 1)
-    ]
-    News.objects.bulk_create(all_news)
+    return make_news(QUANTITY_NEWS + 1)
 
 
 @pytest.fixture
 def several_comments(news, author):
-    for i in range(10):
-        comment = Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Комментарий {i}',
-        )
-        comment.created = timezone.now() + timedelta(days=i)
-        comment.save()
+    return make_comments(news, author, 10)
 
 
 @pytest.fixture
@@ -87,6 +101,11 @@ def news_home():
     return reverse('news:home')
 
 
+@pytest.fixture
+def news_search():
+    return reverse('news:search') + '?q=Новость'
+
+
 @pytest.fixture
 def users_login():
     return reverse('users:login')
@@ -107,6 +126,26 @@ def news_detail(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def news_comments(news):
+    return reverse('news:comments', args=(news.id,))
+
+
+@pytest.fixture
+def news_feed():
+    return reverse('news:feed')
+
+
+@pytest.fixture
+def news_api_list():
+    return reverse('news:api_list')
+
+
+@pytest.fixture
+def news_api_detail(news):
+    return reverse('news:api_detail', args=(news.id,))
+
+
 @pytest.fixture
 def comment_edit(comment):
     return reverse('news:edit', args=(comment.id,))
@@ -125,3 +164,16 @@ def redirect_comment_edit(users_login, comment_edit):
 @pytest.fixture
 def redirect_comment_delete(users_login, comment_delete):
     return f'{users_login}?next={comment_delete}'
+
+
+@pytest.fixture
+def assert_query_budget(settings):
+    """Проверяет, что ответ уложился в бюджет SQL-запросов маршрута."""
+    def check(response):
+        view_name = response.resolver_match.view_name
+        budget = settings.QUERY_BUDGETS[view_name]
+        assert response.query_count <= budget, (
+            f'{view_name}: {response.query_count} SQL-запросов '
+            f'при бюджете {budget}'
+        )
+    return check
@@ -0,0 +1,86 @@
+"""
+Массовое создание тестовых данных.
+
+Объекты вставляются через bulk_create пакетами, без save() и сигналов
+на каждую строку, поэтому подготовка данных не растёт заметно
+с размером набора. Даты задаются явно: от start с шагом step.
+"""
+from datetime import timedelta
+from itertools import cycle
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.utils import timezone
+
+from news.loading import bump_news_versions, raw_timestamps, recount_comments
+from news.models import Comment, News
+
+BATCH_SIZE = 500
+
+
+def bulk_insert(model, objs):
+    """
+    Вставляет объекты и возвращает их из базы по порядку вставки.
+
+    bulk_create в SQLite не проставляет id созданным объектам,
+    поэтому они перечитываются одним запросом.
+    """
+    last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    return list(model.objects.filter(pk__gt=last_id).order_by('pk'))
+
+
+def make_users(usernames):
+    user_model = get_user_model()
+    return bulk_insert(
+        user_model, [user_model(username=name) for name in usernames]
+    )
+
+
+def make_news(count, title='Заголовок', text='Новость', start=None,
+              step=timedelta(days=-1)):
+    """Новости с датами start, start + step, ..."""
+    start = start or timezone.now()
+    return bulk_insert(News, [
+        News(
+            title=f'{title} {index}',
+            text=f'{text} {index}',
+            date=start + step * index,
+        )
+        for index in range(count)
+    ])
+
+
+def make_comments(news, authors, count, text='Комментарий', start=None,
+                  step=timedelta(days=1)):
+    """
+    Комментарии к новостям по кругу от авторов по кругу.
+
+    news и authors — объект или список объектов. Счётчики comment_count
+    и версии кэша обновляются теми же функциями из news.loading, что
+    и в командах загрузки.
+    """
+    all_news = news if isinstance(news, (list, tuple)) else [news]
+    authors = authors if isinstance(authors, (list, tuple)) else [authors]
+    start = start or timezone.now()
+    with raw_timestamps({Comment}):
+        comments = bulk_insert(Comment, [
+            Comment(
+                news=item,
+                author=author,
+                text=f'{text} {index}',
+                created=start + step * index,
+            )
+            for index, item, author in zip(
+                range(count), cycle(all_news), cycle(authors)
+            )
+        ])
+    added = {comment.news_id for comment in comments}
+    recount_comments(added)
+    counts = dict(
+        News.objects.filter(pk__in=added).values_list('pk', 'comment_count')
+    )
+    for item in all_news:
+        item.comment_count = counts.get(item.pk, item.comment_count)
+    bump_news_versions(added)
+    return comments
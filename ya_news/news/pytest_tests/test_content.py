@@ -1,7 +1,17 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+from pytest_lazyfixture import lazy_fixture as lf
 
 from news.forms import CommentForm
+from news.models import Comment, News
+
+from .factories import make_comments, make_news, make_users
 
 
 QUANTITY_NEWS = settings.NEWS_COUNT_ON_HOME_PAGE
@@ -11,8 +21,60 @@ pytestmark = pytest.mark.django_db
 
 def test_note_in_list_for_author(client, several_news, news_home):
     """Количество новостей на главной странице."""
-    assert client.get(news_home).context['object_list'].count(
-    ) == QUANTITY_NEWS
+    assert len(client.get(news_home).context['object_list']) == QUANTITY_NEWS
+
+
+def test_archive_pages_by_cursor(
+    client, several_news, news_home, django_assert_num_queries
+):
+    """Архив листается по курсору, страницы не пересекаются."""
+    first_page = client.get(news_home).context['page_obj']
+    assert not first_page.has_previous
+    with django_assert_num_queries(2):
+        response = client.get(
+            news_home, {'after': first_page.next_cursor}
+        )
+    second_page = response.context['page_obj']
+    assert len(second_page) == 1
+    assert not second_page.has_next
+    assert second_page.object_list[0] not in first_page.object_list
+    back_page = client.get(
+        news_home, {'before': second_page.previous_cursor}
+    ).context['page_obj']
+    assert back_page.object_list == first_page.object_list
+
+
+def test_archive_order_is_stable_for_equal_dates(client, news_home):
+    """Новости с одинаковой датой не теряются между страницами."""
+    make_news(QUANTITY_NEWS * 2 + 1, step=timedelta(0))
+    seen = []
+    params = {}
+    while True:
+        page = client.get(news_home, params).context['page_obj']
+        seen.extend(news.id for news in page)
+        if not page.has_next:
+            break
+        params = {'after': page.next_cursor}
+    assert seen == sorted(News.objects.values_list('id', flat=True))[::-1]
+
+
+def test_invalid_cursor(client, news_home):
+    """Повреждённый курсор даёт 404."""
+    response = client.get(news_home, {'after': 'not-a-cursor'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_home_page_does_not_load_comments(
+    client, several_news, news_home, django_assert_num_queries
+):
+    """
+    Главная страница строится одним запросом без комментариев.
+
+    Ещё один запрос читает время последних изменений для ETag.
+    """
+    with django_assert_num_queries(2) as context:
+        client.get(news_home)
+    assert 'news_comment' not in context.captured_queries[-1]['sql']
 
 
 def test_news_order(client, several_news, news_home):
@@ -32,6 +94,47 @@ def test_comment_order(client, several_comments, news_detail):
     assert all_dates == sorted(all_dates)
 
 
+def test_detail_shows_first_page_of_comments(
+    client, settings, several_comments, news_detail, django_assert_num_queries
+):
+    """На странице новости только первая страница комментариев."""
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    with django_assert_num_queries(3):
+        comments = client.get(news_detail).context['comments']
+    all_dates = [comment.created for comment in comments]
+    assert len(all_dates) == 3
+    assert all_dates == sorted(all_dates)
+    assert comments.has_next
+
+
+def test_comment_pages_fragment(client, settings, several_comments, news):
+    """Фрагмент отдаёт остальные комментарии без повторов."""
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    url = reverse('news:comments', args=(news.id,))
+    seen = []
+    params = {}
+    while True:
+        comments = client.get(url, params).context['comments']
+        seen.extend(comment.id for comment in comments)
+        if not comments.has_next:
+            break
+        params = {'after': comments.next_cursor}
+    assert seen == list(news.comment_set.values_list('id', flat=True))
+    missing = reverse('news:comments', args=(0,))
+    assert client.get(missing).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_more_comments_link(client, settings, several_comments, news_detail):
+    """Без скрипта «Показать ещё» ведёт на следующую страницу новости."""
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    response = client.get(news_detail)
+    first = response.context['comments']
+    link = f'{news_detail}?after={first.next_cursor}'
+    assert f'href="{link}#comments"' in response.content.decode()
+    comments = list(client.get(link).context['comments'])
+    assert comments[0].created > list(first)[-1].created
+
+
 def test_comment_form_author(author_client, news_detail):
     """Форма комментария доступна авторизованному пользователю."""
     response = author_client.get(news_detail)
@@ -42,3 +145,304 @@ def test_comment_form_author(author_client, news_detail):
 def test_comment_form_not_author(client, news_detail):
     """Форма комментария недоступна неавторизованному пользователю."""
     assert 'form' not in client.get(news_detail).context
+
+
+@pytest.fixture(params=(
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+))
+def cache_backend(request, settings, tmp_path):
+    settings.CACHES = {
+        'default': {'BACKEND': request.param, 'LOCATION': str(tmp_path)}
+    }
+
+
+@pytest.mark.parametrize(
+    'reverse_url', (lf('news_home'), lf('news_detail'))
+)
+def test_anonymous_page_cache_invalidation(
+    cache_backend, client, author, news, reverse_url,
+    django_assert_num_queries
+):
+    """Страница берётся из кэша до изменения комментариев."""
+    client.get(reverse_url)
+    with django_assert_num_queries(0):
+        response = client.get(reverse_url)
+    assert 'Комментариев: 1' not in response.content.decode()
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    content = client.get(reverse_url).content.decode()
+    assert 'Комментариев: 1' in content or 'Свежий' in content
+
+
+def test_comment_fragment_cache(
+    author, author_client, not_author_client, several_comments, news,
+    news_detail, django_assert_num_queries
+):
+    """
+    Список комментариев берётся из кэша фрагментов и для авторизованных.
+
+    В кэшированном списке нет ссылок редактирования: страница один раз
+    добавляет их скриптом к комментариям текущего пользователя.
+    """
+    author_client.get(news_detail)
+    with django_assert_num_queries(3) as context:
+        content = not_author_client.get(news_detail).content.decode()
+    assert not any(
+        'FROM "news_comment"' in query['sql']
+        for query in context.captured_queries
+    )
+    assert f'data-author="{author.pk}"' in content
+    assert content.count('edit_comment') == 1
+    assert f'.comment[data-author="{author.pk}"]' not in content
+    comment = news.comment_set.first()
+    comment.text = 'Исправлено'
+    comment.save()
+    content = author_client.get(news_detail).content.decode()
+    assert 'Исправлено' in content
+    assert content.count('edit_comment') == 1
+    assert f'.comment[data-author="{author.pk}"]' in content
+
+
+def test_authorized_page_is_not_cached(author_client, news_detail):
+    """Авторизованный пользователь получает свежую форму с CSRF-токеном."""
+    author_client.get(news_detail)
+    response = author_client.get(news_detail)
+    assert isinstance(response.context['form'], CommentForm)
+    assert 'csrfmiddlewaretoken' in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    'reverse_url', (lf('news_home'), lf('news_detail'))
+)
+def test_conditional_get(
+    client, settings, author, news, reverse_url, django_assert_num_queries
+):
+    """Повторный запрос с ETag получает 304, пока данные не менялись."""
+    timeout = settings.NEWS_PAGE_CACHE_TIMEOUT
+    settings.NEWS_PAGE_CACHE_TIMEOUT = 0
+    response = client.get(reverse_url)
+    etag = response['ETag']
+    assert 'Last-Modified' not in response
+    with django_assert_num_queries(1):
+        response = client.get(reverse_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    settings.NEWS_PAGE_CACHE_TIMEOUT = timeout
+    client.get(reverse_url)
+    with django_assert_num_queries(0):
+        response = client.get(reverse_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news=news, author=author, text='Свежий')
+    response = client.get(reverse_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+    etag = response['ETag']
+    news.title = 'Исправленный заголовок'
+    news.save()
+    response = client.get(reverse_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def search(client, query, **params):
+    return client.get(
+        reverse('news:search'), {'q': query, **params}
+    ).context['page_obj']
+
+
+def test_search_ranks_title_matches_first(client):
+    """Совпадение в заголовке выше совпадения в тексте."""
+    in_text = News.objects.create(title='Другое', text='Будет погода')
+    in_title = News.objects.create(title='Погода', text='Новость')
+    News.objects.create(title='Заголовок', text='Новость')
+    assert list(search(client, 'ПОГОД')) == [in_title, in_text]
+
+
+def test_search_index_follows_changes(client, news):
+    """Индекс обновляется триггерами при изменении и удалении."""
+    news.title = 'Сенсация'
+    news.save()
+    assert list(search(client, 'сенсация')) == [news]
+    assert not search(client, 'заголовок').object_list
+    news.delete()
+    assert not search(client, 'сенсация').object_list
+
+
+def test_search_pages_by_cursor(client):
+    """Результаты поиска листаются по курсору без повторов."""
+    News.objects.bulk_create(
+        News(title=f'Заголовок {i}', text='слово ' * (i + 1))
+        for i in range(QUANTITY_NEWS * 2 + 1)
+    )
+    seen = []
+    params = {}
+    while True:
+        page = search(client, 'слово', **params)
+        seen.extend(news.id for news in page)
+        if not page.has_next:
+            break
+        params = {'after': page.next_cursor}
+    assert sorted(seen) == sorted(News.objects.values_list('id', flat=True))
+
+
+@pytest.mark.parametrize('query', ('" OR NEAR(', 'AND', '***', ''))
+def test_search_ignores_fts_syntax(client, news, query):
+    """Служебный синтаксис FTS5 из запроса не ломает поиск."""
+    response = client.get(reverse('news:search'), {'q': query})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_search_lists_older_matches_after_candidates(client, settings):
+    """Совпадения старше ранжируемых идут следом от новых к старым."""
+    settings.NEWS_SEARCH_CANDIDATES = 3
+    settings.NEWS_COUNT_ON_HOME_PAGE = 2
+    News.objects.bulk_create(
+        News(title=f'Заголовок {i}', text='слово ' * (i % 3 + 1))
+        for i in range(6)
+    )
+    ids = list(News.objects.order_by('id').values_list('id', flat=True))
+    seen = []
+    params = {}
+    while True:
+        page = search(client, 'слово', **params)
+        seen.extend(news.id for news in page)
+        if not page.has_next:
+            break
+        params = {'after': page.next_cursor}
+    assert seen == [ids[5], ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+
+def test_admin_comment_inline_is_paginated(
+    admin_client, settings, news, author, assert_query_budget
+):
+    """Страница новости в админке не зависит от числа комментариев."""
+    url = reverse('admin:news_news_change', args=(news.id,))
+    authors = make_users(f'Читатель {index}' for index in range(30))
+    make_comments(news, authors, 3)
+    admin_client.get(url)
+    query_count = admin_client.get(url).query_count
+    make_comments(news, authors, 30)
+    response = admin_client.get(url)
+    assert_query_budget(response)
+    assert response.query_count == query_count
+    settings.COMMENTS_COUNT_ON_ADMIN_PAGE = 3
+    response = admin_client.get(url)
+    formset = response.context['inline_admin_formsets'][0].formset
+    newest = news.comment_set.order_by('-id')[:3]
+    assert [form.instance for form in formset.forms] == list(newest)
+    next_page = admin_client.get(url, {'after': formset.page.next_cursor})
+    formset = next_page.context['inline_admin_formsets'][0].formset
+    assert not set(form.instance for form in formset.forms) & set(newest)
+
+
+def test_admin_changelist_shows_comment_count(
+    admin_client, several_news, news, author, assert_query_budget
+):
+    """Список новостей в админке показывает счётчик без подсчёта."""
+    url = reverse('admin:news_news_changelist')
+    admin_client.get(url)
+    query_count = admin_client.get(url).query_count
+    make_comments(news, author, 30)
+    response = admin_client.get(url)
+    assert_query_budget(response)
+    assert response.query_count == query_count
+    assert 'news_comment' not in str(response.context['cl'].queryset.query)
+
+
+def test_api_news_list_fields_and_cursor(client, several_news, news_api_list):
+    """API отдаёт только запрошенные поля и листается по курсору."""
+    seen = []
+    params = {'fields': 'title, id'}
+    while True:
+        data = client.get(news_api_list, params).json()
+        assert {tuple(row) for row in data['results']} == {('title', 'id')}
+        seen.extend(row['id'] for row in data['results'])
+        if data['next'] is None:
+            break
+        params['after'] = data['next']
+    assert seen == list(News.objects.values_list('id', flat=True))
+
+
+def test_api_news_detail_streams_comments(
+    client, several_comments, news, news_api_detail
+):
+    """Комментарии новости отдаются потоком в порядке создания."""
+    response = client.get(news_api_detail)
+    assert response.streaming
+    data = json.loads(b''.join(response.streaming_content))
+    assert data['title'] == news.title
+    assert data['comment_count'] == news.comment_count
+    comments = list(news.comment_set.select_related('author'))
+    assert data['comments'] == [
+        {
+            'id': comment.id,
+            'author': comment.author.username,
+            'text': comment.text,
+            'created': DjangoJSONEncoder().default(comment.created),
+        }
+        for comment in comments
+    ]
+
+
+def test_api_news_detail_without_comments(
+    client, several_comments, news_api_detail, django_assert_num_queries
+):
+    """Без комментариев в ?fields= хватает одного запроса."""
+    with django_assert_num_queries(1):
+        response = client.get(news_api_detail, {'fields': 'title'})
+    assert response.json() == {'title': 'Заголовок'}
+
+
+@pytest.mark.parametrize(
+    'reverse_url, params, http_status',
+    (
+        (lf('news_api_list'), {'fields': 'title,password'}, 400),
+        (lf('news_api_list'), {'fields': ''}, 400),
+        (lf('news_api_list'), {'after': 'not-a-cursor'}, 400),
+        (lf('news_api_detail'), {'fields': 'author'}, 400),
+    )
+)
+def test_api_rejects_bad_params(
+    client, news, reverse_url, params, http_status
+):
+    """Неизвестные поля и повреждённый курсор дают 400."""
+    response = client.get(reverse_url, params)
+    assert response.status_code == http_status
+    assert 'error' in response.json()
+
+
+def test_api_unknown_news(client):
+    """Несуществующая новость даёт 404 в JSON."""
+    response = client.get(reverse('news:api_detail', args=(0,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert 'error' in response.json()
+
+
+def feed_content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def test_feed_is_served_from_file(
+    client, news, news_feed, feed_path, django_assert_num_queries
+):
+    """Лента собирается один раз и дальше читается из файла."""
+    client.get(news_feed)
+    assert feed_path.exists()
+    with django_assert_num_queries(0):
+        response = client.get(news_feed)
+        not_modified = client.get(
+            news_feed, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+    assert response['Content-Type'].startswith('application/atom+xml')
+    assert news.title in feed_content(response)
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_feed_is_rebuilt_on_news_save(
+    client, news, news_feed, django_capture_on_commit_callbacks
+):
+    """Сохранение новости пересобирает ленту после коммита."""
+    etag = client.get(news_feed)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Сенсация', text='Новость')
+    response = client.get(news_feed, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Сенсация' in feed_content(response)
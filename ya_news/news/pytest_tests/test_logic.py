@@ -1,10 +1,28 @@
+import asyncio
+import json
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.db.models.functions import Length
+from django.http import HttpResponse
+from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
+from news.events import broker
+from news.management.commands import load_news
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.middleware import ReadWriteRoutingMiddleware
+from news.models import BadWord, Comment, News
+from news.moderation import (
+    AUTOMATON_MIN_WORDS, SubstringMatcher, WordMatcher, make_matcher
+)
+from news.routers import ReadWriteRouter
+from yanews.asgi import application
+from .factories import make_users
 
 
 FORM_DATA = {'text': 'Новый комментарий'}
@@ -91,3 +109,349 @@ def test_not_author_cant_edit_comment(
     assert new_comment.author == comment.author
     assert new_comment.news == comment.news
     assert new_comment.text == comment.text
+
+
+def test_comment_count_follows_create_and_delete(
+    author_client, news, news_detail
+):
+    """Счётчик комментариев меняется при создании и удалении."""
+    author_client.post(news_detail, data=FORM_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    author_client.post(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_count_follows_admin_and_cascade(
+    admin_client, author, news
+):
+    """Счётчик верен после inline в админке и удаления автора."""
+    url = reverse('admin:news_news_change', args=(news.id,))
+    admin_client.post(url, {
+        'title': news.title,
+        'text': news.text,
+        'date': f'{news.date:%Y-%m-%d}',
+        'comment_set-TOTAL_FORMS': 1,
+        'comment_set-INITIAL_FORMS': 0,
+        'comment_set-0-text': 'Из админки',
+        'comment_set-0-author': author.pk,
+    })
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_recount_comments_command(several_comments, news):
+    """Команда recount_comments восстанавливает счётчик."""
+    News.objects.update(comment_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('ushers', True),
+        ('a his b', True),
+        ('HERS', True),
+        ('shell', True),
+        ('world', False),
+        ('', False),
+    )
+)
+@pytest.mark.parametrize('matcher', (SubstringMatcher, WordMatcher))
+def test_word_matcher(matcher, text, expected):
+    """Слова находятся, в том числе вложенные друг в друга."""
+    assert matcher(('he', 'she', 'his', 'hers')).search(text) is expected
+
+
+def test_make_matcher_by_list_size():
+    """Автомат строится только для длинного списка слов."""
+    words = [f'слово{index}' for index in range(AUTOMATON_MIN_WORDS)]
+    assert isinstance(make_matcher(words[:2]), SubstringMatcher)
+    assert isinstance(make_matcher(words), WordMatcher)
+
+
+def test_bad_words_reload_from_file(
+    settings, tmp_path, author_client, news_detail
+):
+    """Слова из файла подхватываются без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# список\nбука\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    settings.BAD_WORDS_RELOAD_INTERVAL = 0
+    response = author_client.post(news_detail, data={'text': 'Бука!'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    words_file.write_text('бяка\n', encoding='utf-8')
+    response = author_client.post(news_detail, data={'text': 'Бука!'})
+    assertRedirects(response, f'{news_detail}#comments')
+
+
+def test_bad_words_from_db(settings, author_client, news_detail):
+    """Слова из таблицы BadWord тоже запрещены."""
+    settings.BAD_WORDS_FROM_DB = True
+    settings.BAD_WORDS_RELOAD_INTERVAL = 0
+    BadWord.objects.create(word='злюка')
+    response = author_client.post(news_detail, data={'text': 'ЗЛЮКА'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+
+
+def test_load_news_from_fixture(settings):
+    """load_news загружает фикстуру проекта так же, как loaddata."""
+    fixture = settings.BASE_DIR / 'news' / 'fixtures' / 'news.json'
+    with open(fixture, encoding='utf-8') as file:
+        expected = json.load(file)
+    call_command(
+        'load_news', str(fixture), batch_size=2, chunk_size=3,
+        stdout=StringIO()
+    )
+    assert list(News.objects.values_list('title', flat=True)) == [
+        record['fields']['title'] for record in expected
+    ]
+
+
+def test_load_news_ndjson_with_comments(tmp_path, author):
+    """Комментарии из NDJSON сохраняют дату, счётчик пересчитывается."""
+    records = [
+        {'model': 'news.news', 'pk': 7, 'fields': {
+            'title': 'Заголовок', 'text': 'Новость', 'date': '2022-11-01'
+        }},
+        *(
+            {'model': 'news.comment', 'fields': {
+                'news': 7, 'author': author.id, 'text': f'Комментарий {i}',
+                'created': f'2022-11-0{i + 1}T10:00:00Z',
+            }}
+            for i in range(3)
+        ),
+    ]
+    path = tmp_path / 'news.ndjson'
+    path.write_text(
+        '\n'.join(json.dumps(record) for record in records),
+        encoding='utf-8'
+    )
+    call_command('load_news', str(path), batch_size=2, stdout=StringIO())
+    news = News.objects.get(pk=7)
+    assert news.comment_count == 3
+    assert [
+        comment.created.day for comment in news.comment_set.all()
+    ] == [1, 2, 3]
+
+
+@pytest.mark.parametrize('read_size', (1, 2, 7, 100))
+def test_load_news_chunk_boundaries(settings, monkeypatch, read_size):
+    """Объект, разрезанный границей куска, дочитывается, а не отвергается."""
+    fixture = settings.BASE_DIR / 'news' / 'fixtures' / 'news.json'
+    text = fixture.read_text(encoding='utf-8')
+    monkeypatch.setattr(load_news, 'READ_SIZE', read_size)
+    assert list(load_news.iter_json_array(StringIO(text))) == json.loads(text)
+
+
+def test_load_news_stops_on_broken_object():
+    """Испорченный объект прерывает разбор, файл не дочитывается."""
+    stream = StringIO(
+        '[{"pk": 1}, {"pk": tru}, ' + '{"pk": 3}, ' * 100_000 + '{}]'
+    )
+    with pytest.raises(CommandError, match='Некорректный JSON'):
+        list(load_news.iter_json_array(stream))
+    assert stream.tell() <= load_news.READ_SIZE
+
+
+def test_load_news_existing_pk(tmp_path, news):
+    """Существующий pk не перезаписывается, загрузка прерывается."""
+    path = tmp_path / 'news.ndjson'
+    record = {'model': 'news.news', 'pk': news.pk, 'fields': {
+        'title': 'Другой заголовок', 'text': 'Новость', 'date': '2022-11-01'
+    }}
+    path.write_text(json.dumps(record), encoding='utf-8')
+    with pytest.raises(CommandError, match='loaddata'):
+        call_command('load_news', str(path), stdout=StringIO())
+    news.refresh_from_db()
+    assert news.title != 'Другой заголовок'
+
+
+@pytest.mark.parametrize('method, cookies, read_db', (
+    ('get', {}, 'replica'),
+    ('post', {}, 'default'),
+    ('get', {ReadWriteRoutingMiddleware.cookie_name: '1'}, 'default'),
+))
+def test_read_write_routing(settings, rf, method, cookies, read_db):
+    """Запись и чтение после записи идут в основную базу."""
+    settings.DATABASE_READ_REPLICA = 'replica'
+    router = ReadWriteRouter()
+    routed = {}
+
+    def view(request):
+        routed['read'] = router.db_for_read(News)
+        routed['write'] = router.db_for_write(News)
+        return HttpResponse()
+
+    request = getattr(rf, method)('/')
+    request.COOKIES.update(cookies)
+    response = ReadWriteRoutingMiddleware(view)(request)
+    assert routed == {'read': read_db, 'write': 'default'}
+    assert router.db_for_read(News) == 'replica'
+    pinned = ReadWriteRoutingMiddleware.cookie_name in response.cookies
+    assert pinned == (method == 'post')
+
+
+async def open_event_stream(news_id, *headers):
+    """
+    Запускает поток событий и возвращает очередь отправленных кусков.
+
+    Как настоящий сервер, receive() сначала отдаёт тело запроса,
+    а http.disconnect — только после close().
+    """
+    sent = asyncio.Queue()
+    disconnected = asyncio.Event()
+    request = {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def receive():
+        nonlocal request
+        if request is not None:
+            message, request = request, None
+            return message
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': reverse('news:events', args=(news_id,)),
+        'headers': list(headers),
+    }
+    task = asyncio.ensure_future(application(scope, receive, sent.put))
+    start = await sent.get()
+    assert start['status'] == HTTPStatus.OK
+    assert (await sent.get())['body'].startswith(b'retry:')
+
+    async def close():
+        disconnected.set()
+        await task
+        rest = [sent.get_nowait() for _ in range(sent.qsize())]
+        assert rest[-1] == {'type': 'http.response.body', 'body': b''}
+
+    return sent, close
+
+
+def test_comment_events_stream(settings, news, django_assert_num_queries):
+    """Поток шлёт пинги и новые комментарии без запросов к базе."""
+    settings.NEWS_EVENTS_KEEPALIVE = 0.01
+    message = {'id': 1, 'author': 'Автор', 'text': 'Привет', 'created': ''}
+
+    async def scenario():
+        sent, close = await open_event_stream(news.id)
+        keepalive = (await asyncio.wait_for(sent.get(), 1))['body']
+        broker.publish(news.id, message)
+        while True:
+            body = (await asyncio.wait_for(sent.get(), 1))['body']
+            if body != keepalive:
+                break
+        await close()
+        return keepalive, body
+
+    with django_assert_num_queries(0):
+        keepalive, body = asyncio.run(scenario())
+    assert keepalive == b': keepalive\n\n'
+    assert body.startswith(b'id: 1\nevent: comment\ndata: ')
+    assert json.loads(body.decode().split('data: ')[1]) == message
+    assert broker.subscribers(news.id) == 0
+
+
+def test_new_comment_is_published_on_commit(
+    author_client, news, news_detail, django_capture_on_commit_callbacks
+):
+    """Новый комментарий уходит подписчикам после коммита."""
+    async def subscribe():
+        return broker.subscribe(news.id)
+
+    loop = asyncio.new_event_loop()
+    queue = loop.run_until_complete(subscribe())
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            author_client.post(news_detail, data=FORM_DATA)
+        message = loop.run_until_complete(asyncio.wait_for(queue.get(), 1))
+    finally:
+        broker.unsubscribe(news.id, queue)
+        loop.close()
+    assert message['id'] == Comment.objects.get().pk
+    assert message['text'] == FORM_DATA['text']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_events_resume_from_last_event_id(
+    settings, several_comments, news
+):
+    """Переподключение с Last-Event-ID досылает пропущенные комментарии."""
+    settings.NEWS_EVENTS_KEEPALIVE = 60
+    comments = list(news.comment_set.order_by('pk'))
+    last_seen = str(comments[-3].pk).encode()
+
+    async def scenario():
+        sent, close = await open_event_stream(
+            news.id, (b'last-event-id', last_seen)
+        )
+        bodies = [
+            (await asyncio.wait_for(sent.get(), 1))['body']
+            for _ in range(2)
+        ]
+        await close()
+        return bodies
+
+    bodies = asyncio.run(scenario())
+    assert [body.split(b'\n')[0] for body in bodies] == [
+        f'id: {comment.pk}'.encode() for comment in comments[-2:]
+    ]
+
+
+def test_comment_events_under_wsgi(client, news):
+    """Без ASGI поток недоступен, и EventSource не переподключается."""
+    response = client.get(reverse('news:events', args=(news.id,)))
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+
+def test_cached_auth_profile(
+    settings, client, author, news_detail, django_assert_num_queries
+):
+    """Профиль 'cache' читает сессию и пользователя из кэша."""
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+    client.force_login(author)
+    client.get(news_detail)
+    with django_assert_num_queries(1) as context:
+        client.get(news_detail)
+    assert 'FROM "news_news"' in context.captured_queries[0]['sql']
+    author.first_name = 'Имя'
+    author.save()
+    with django_assert_num_queries(2) as context:
+        response = client.get(news_detail)
+    assert 'FROM "auth_user"' in context.captured_queries[0]['sql']
+    assert response.context['user'].first_name == 'Имя'
+
+
+def test_generate_news_command(author):
+    """Генератор создаёт данные с перекосом числа комментариев."""
+    user_model = get_user_model()
+    # Имя, которое генератор выбрал бы первым: после наибольшего id.
+    make_users([f'user{author.pk + 3}'])
+    call_command(
+        'generate_news', '--users', '5', '--news', '50',
+        '--comments', '1000', '--batch-size', '300', '--seed', '1',
+        stdout=StringIO(),
+    )
+    assert user_model.objects.count() == 3 + 5
+    assert News.objects.count() == 50
+    title_length = News._meta.get_field('title').max_length
+    assert not News.objects.annotate(
+        title_length=Length('title')
+    ).filter(title_length__gt=title_length).exists()
+    counts = list(News.objects.values_list('comment_count', flat=True))
+    assert sum(counts) == Comment.objects.count() == 1000
+    assert max(counts) > 3 * sum(counts) / len(counts)
+    assert not Comment.objects.filter(
+        created__date__lt=F('news__date')
+    ).exists()
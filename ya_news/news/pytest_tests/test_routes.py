@@ -19,10 +19,15 @@ pytestmark = pytest.mark.django_db
     'reverse_url, parametrized_client, http_status',
     (
         (lf('news_home'), ANONIM, OK),
+        (lf('news_search'), ANONIM, OK),
         (lf('users_login'), ANONIM, OK),
         (lf('users_logout'), ANONIM, OK),
         (lf('users_signup'), ANONIM, OK),
         (lf('news_detail'), ANONIM, OK),
+        (lf('news_comments'), ANONIM, OK),
+        (lf('news_feed'), ANONIM, OK),
+        (lf('news_api_list'), ANONIM, OK),
+        (lf('news_api_detail'), ANONIM, OK),
         (lf('comment_edit'), AUTHOR, OK),
         (lf('comment_delete'), AUTHOR, OK),
         (lf('comment_edit'), NOT_AUTHOR, NOT_FOUND),
@@ -46,3 +51,33 @@ def test_redirect(client, reverse_url, redirect_url):
     """Редактирование и удаление комментария анонимным пользователем."""
     response = client.get(reverse_url)
     assertRedirects(response, redirect_url)
+
+
+@pytest.mark.parametrize(
+    'reverse_url, parametrized_client, method',
+    (
+        (lf('news_home'), ANONIM, 'get'),
+        (lf('news_home'), AUTHOR, 'get'),
+        (lf('news_search'), AUTHOR, 'get'),
+        (lf('news_detail'), ANONIM, 'get'),
+        (lf('news_detail'), AUTHOR, 'get'),
+        (lf('news_detail'), AUTHOR, 'post'),
+        (lf('news_comments'), AUTHOR, 'get'),
+        (lf('news_feed'), ANONIM, 'get'),
+        (lf('news_api_list'), ANONIM, 'get'),
+        (lf('news_api_detail'), ANONIM, 'get'),
+        (lf('comment_edit'), AUTHOR, 'get'),
+        (lf('comment_edit'), AUTHOR, 'post'),
+        (lf('comment_delete'), AUTHOR, 'get'),
+        (lf('comment_delete'), AUTHOR, 'post'),
+    )
+)
+def test_query_budget(
+    reverse_url, parametrized_client, method, several_comments,
+    assert_query_budget
+):
+    """Маршруты укладываются в бюджет SQL-запросов."""
+    response = getattr(parametrized_client, method)(
+        reverse_url, data={'text': 'Комментарий'}
+    )
+    assert_query_budget(response)
@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_use_primary = ContextVar('use_primary', default=False)
+
+
+@contextmanager
+def use_primary(enabled=True):
+    """Направляет чтение в основную базу внутри блока."""
+    token = _use_primary.set(enabled)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class ReadWriteRouter:
+    """
+    Чтение из реплики, запись в основную базу.
+
+    Реплика задаётся настройкой DATABASE_READ_REPLICA. Внутри use_primary()
+    чтение тоже идёт в основную базу: так ReadWriteRoutingMiddleware
+    обеспечивает чтение своих записей после отправки формы.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_primary.get() or not settings.DATABASE_READ_REPLICA:
+            return 'default'
+        return settings.DATABASE_READ_REPLICA
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,113 @@
+import re
+
+from django.conf import settings
+
+from .models import News
+from .pagination import (
+    CursorPage, InvalidCursor, decode_cursor, encode_cursor
+)
+
+WORD_RE = re.compile(r'\w+')
+
+# Совпадение в заголовке весит больше, чем в тексте.
+RANK_SQL = 'bm25(news_news_fts, 10.0, 1.0)'
+
+# Ранжируются только NEWS_SEARCH_CANDIDATES самых свежих совпадений:
+# для слов, которые есть почти в каждой новости, bm25 иначе пришлось бы
+# считать по всей таблице.
+SEARCH_SQL = f'''
+    SELECT news_news.*, found.score
+    FROM (
+        SELECT rowid, {RANK_SQL} AS score
+        FROM news_news_fts
+        WHERE news_news_fts MATCH %s AND rowid >= COALESCE((
+            SELECT rowid FROM news_news_fts
+            WHERE news_news_fts MATCH %s
+            ORDER BY rowid DESC LIMIT 1 OFFSET %s
+        ), 0) {{seek}}
+        ORDER BY score, rowid
+        LIMIT %s
+    ) AS found
+    JOIN news_news ON news_news.id = found.rowid
+    ORDER BY found.score, news_news.id
+'''
+
+SEEK_SQL = f'AND ({RANK_SQL}, rowid) > (%s, %s)'
+
+# Совпадения старше ранжируемых идут после них без ранга, от новых
+# к старым. Запрос нужен, только когда ранжированные закончились.
+OLDER_SQL = '''
+    SELECT news_news.*, NULL AS score
+    FROM (
+        SELECT rowid FROM news_news_fts
+        WHERE news_news_fts MATCH %s AND rowid < COALESCE((
+            SELECT rowid FROM news_news_fts
+            WHERE news_news_fts MATCH %s
+            ORDER BY rowid DESC LIMIT 1 OFFSET %s
+        ), 0) {seek}
+        ORDER BY rowid DESC
+        LIMIT %s
+    ) AS found
+    JOIN news_news ON news_news.id = found.rowid
+    ORDER BY news_news.id DESC
+'''
+
+OLDER_SEEK_SQL = 'AND rowid < %s'
+
+
+def build_match_query(text):
+    """
+    Превращает строку пользователя в безопасный запрос FTS5.
+
+    Каждое слово ищется как префикс, все слова должны встретиться.
+    Синтаксис FTS5 (кавычки, AND, NEAR) из ввода не интерпретируется.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text.lower()))
+
+
+def read_cursor(cursor):
+    """Пара (ранг, id) из курсора; ранг None у курсора среди старых."""
+    score, news_id = decode_cursor(cursor, 2)
+    try:
+        return (None if score is None else float(score)), int(news_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def search_news(text, per_page, after=None):
+    """
+    Полнотекстовый поиск по новостям с сортировкой по bm25.
+
+    Страницы выбираются по курсору из пары (ранг, id), поэтому
+    следующая страница не пересчитывает предыдущие. Ранжируются не более
+    NEWS_SEARCH_CANDIDATES самых свежих совпадений, так что время ответа
+    не растёт вместе с таблицей; остальные совпадения выдаются следом
+    по убыванию id.
+    """
+    match = build_match_query(text)
+    if not match:
+        return CursorPage([])
+    score, news_id = read_cursor(after) if after else (None, None)
+    candidates = [match, match, settings.NEWS_SEARCH_CANDIDATES - 1]
+    items = []
+    if not after or score is not None:
+        seek = [score, news_id] if after else []
+        items = list(News.objects.raw(
+            SEARCH_SQL.format(seek=SEEK_SQL if seek else ''),
+            [*candidates, *seek, per_page + 1],
+        ))
+    if len(items) <= per_page:
+        seek = [news_id] if after and score is None else []
+        items += News.objects.raw(
+            OLDER_SQL.format(seek=OLDER_SEEK_SQL if seek else ''),
+            [*candidates, *seek, per_page + 1 - len(items)],
+        )
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    return CursorPage(
+        items,
+        next_cursor=(
+            encode_cursor([items[-1].score, items[-1].id]) if has_next
+            else None
+        ),
+    )
@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import user_cache_key
+from .cache import (
+    LIST_VERSION_KEY, bump_versions, comments_version_key, detail_version_key
+)
+from .events import publish_comment
+from .feeds import write_feed
+from .models import Comment, News
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    bump_versions(LIST_VERSION_KEY, detail_version_key(instance.pk))
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def rebuild_feed(sender, **kwargs):
+    """Лента пересобирается при изменении новостей, а не на запрос."""
+    transaction.on_commit(write_feed)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    bump_versions(
+        LIST_VERSION_KEY,
+        detail_version_key(instance.news_id),
+        comments_version_key(instance.news_id),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_added_comment(sender, instance, created, **kwargs):
+    """
+    Счётчик comment_count растёт при любом способе добавления.
+
+    Это форма на сайте и inline в админке. bulk_create сигналов
+    не отправляет, после него счётчики пересчитывает
+    news.loading.recount_comments.
+    """
+    if created:
+        News.objects.filter(pk=instance.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Удаление на сайте, в админке и каскадом вместе с автором."""
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def announce_comment(sender, instance, created, **kwargs):
+    """Подписчики узнают о комментарии только после коммита."""
+    if created:
+        transaction.on_commit(lambda: publish_comment(instance))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает соединения с SQLite: WAL, mmap и т. п."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PRAGMAS.get(connection.alias, {})
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -1,16 +1,26 @@
 from django.urls import path
 
-from news import views
+from news import api, feeds, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('feed/', feeds.news_feed, name='feed'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsCommentList.as_view(),
+        name='comments'
+    ),
+    path('news/<int:pk>/events/', views.comment_events, name='events'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.news_list, name='api_list'),
+    path('api/news/<int:pk>/', api.news_detail, name='api_detail'),
 ]
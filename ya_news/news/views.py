@@ -1,49 +1,162 @@
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.db.models import Max, Subquery
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views import generic
 
+from .cache import (
+    CachedPageMixin, LIST_VERSION_KEY, comments_version_key,
+    detail_version_key, get_versions
+)
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import CursorPaginationMixin, InvalidCursor
+from .search import search_news
 
 
-class NewsList(generic.ListView):
-    """Список новостей."""
+class NewsList(CachedPageMixin, CursorPaginationMixin, generic.ListView):
+    """Лента новостей с архивом, разбитым на страницы по курсору."""
     model = News
     template_name = 'news/home.html'
+    cursor_ordering = ('-date', '-id')
 
-    def get_queryset(self):
+    def get_version_keys(self):
+        return (LIST_VERSION_KEY,)
+
+    def get_validators(self):
+        """Дата свежей новости и время последнего комментария."""
+        latest = self.model.objects.annotate(
+            last_comment=Subquery(
+                Comment.objects.order_by('-id').values('created')[:1]
+            )
+        ).values_list('date', 'last_comment').first()
+        return latest or 'empty'
+
+    def get_context_data(self, **kwargs):
         """
-        Выводим только несколько последних новостей.
+        Выводим страницу из нескольких новостей.
 
         Их количество определяется в настройках проекта.
+        Комментарии не загружаются: их число хранится в comment_count.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        page = self.paginate_by_cursor(
+            self.object_list, settings.NEWS_COUNT_ON_HOME_PAGE
+        )
+        return super().get_context_data(
+            object_list=page.object_list, page_obj=page, **kwargs
+        )
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        try:
+            context['page_obj'] = search_news(
+                query,
+                settings.NEWS_COUNT_ON_HOME_PAGE,
+                after=self.request.GET.get('after'),
+            )
+        except InvalidCursor:
+            raise Http404('Неверный курсор страницы.')
+        context['query'] = query
+        return context
+
+
+def get_comments(news_id):
+    """Комментарии к новости в порядке вывода на странице."""
+    return Comment.objects.filter(news_id=news_id).select_related('author')
+
+
+class CommentPageMixin(CursorPaginationMixin):
+    """
+    Контекст для шаблона news/comments.html.
+
+    Список комментариев кэшируется в шаблоне по версии комментариев
+    новости, поэтому страница комментариев ленивая: при попадании
+    в кэш фрагмента запрос к базе не выполняется.
+    """
+    cursor_ordering = ('created', 'id')
+
+    def get_comments_context(self, news_id):
+        return {
+            'news_id': news_id,
+            'comments': self.paginate_by_cursor(
+                get_comments(news_id),
+                settings.COMMENTS_COUNT_ON_PAGE,
+                lazy=True,
+            ),
+            'comments_version': get_versions(
+                comments_version_key(news_id)
+            )[0],
+            'comments_cache_timeout': settings.NEWS_PAGE_CACHE_TIMEOUT,
+        }
 
 
-class NewsDetail(generic.DetailView):
+class NewsDetail(CachedPageMixin, CommentPageMixin, generic.DetailView):
+    """
+    Новость подробно.
+
+    Выводится только первая страница комментариев,
+    остальные подгружаются через NewsCommentList.
+    """
     model = News
     template_name = 'news/detail.html'
 
+    def get_version_keys(self):
+        return (detail_version_key(self.kwargs['pk']),)
+
+    def get_validators(self):
+        """Дата новости, число и время последнего комментария."""
+        news = self.model.objects.filter(pk=self.kwargs['pk']).annotate(
+            last_comment=Max('comment__created')
+        ).values_list('date', 'comment_count', 'last_comment').first()
+        return news
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object.pk))
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsCommentList(CommentPageMixin, generic.TemplateView):
+    """Фрагмент страницы со следующей порцией комментариев."""
+    template_name = 'news/comments.html'
+
+    def get_context_data(self, **kwargs):
+        if not News.objects.filter(pk=self.kwargs['pk']).exists():
+            raise Http404('Новость не найдена.')
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.kwargs['pk']))
+        return context
+
+
+def comment_events(request, pk):
+    """
+    Поток новых комментариев отдаёт ASGI-приложение yanews.asgi.
+
+    Сюда запрос попадает только под WSGI, где держать соединения
+    открытыми нельзя. Ответ 204 говорит EventSource не переподключаться.
+    """
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -55,16 +168,23 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object.pk))
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +203,15 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -3,6 +3,9 @@ ASGI config for yanews project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Long-lived server-sent event streams are served directly from
+news.events, everything else goes through Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
@@ -10,7 +13,22 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import Resolver404, resolve
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from news.events import stream_comments  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            match = None
+        if match is not None and match.view_name == 'news:events':
+            await stream_comments(scope, receive, send, match.kwargs['pk'])
+            return
+    await django_application(scope, receive, send)
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.middleware.QueryBudgetMiddleware',
+    'news.middleware.ReadWriteRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,9 +59,59 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # Тот же файл, открытый только на чтение. Благодаря WAL читатели
+    # не ждут завершения записи и сразу видят подтверждённые данные.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{BASE_DIR / "db.sqlite3"}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['news.routers.ReadWriteRouter']
+
+DATABASE_READ_REPLICA = 'replica'
+
+# Сколько секунд после записи пользователь читает из основной базы.
+DATABASE_PIN_SECONDS = 10
+
+SQLITE_PRAGMAS = {
+    'default': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 256 * 1024 * 1024,
+    },
+    'replica': {
+        'mmap_size': 256 * 1024 * 1024,
+        'query_only': 'on',
+    },
+}
+
+# Для нескольких процессов без общего кэша подойдёт файловый бэкенд:
+# 'django.core.cache.backends.filebased.FileBasedCache'
+# с 'LOCATION': BASE_DIR / 'cache'.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Профиль сессий и аутентификации (переменная окружения AUTH_PROFILE):
+# 'db' — сессия и пользователь читаются из базы на каждый запрос;
+# 'cache' — сессии в кэше с записью в базу (cached_db), пользователь
+# сессии кэшируется на USER_CACHE_TIMEOUT секунд.
+AUTH_PROFILE = os.environ.get('AUTH_PROFILE', 'db')
+
+USER_CACHE_TIMEOUT = 30
+
+if AUTH_PROFILE == 'cache':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +134,45 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+COMMENTS_COUNT_ON_ADMIN_PAGE = 20
+
+NEWS_SEARCH_CANDIDATES = 5000
+
+# Atom-лента собирается в файл при изменении новостей. Файл лежит
+# вне исходников; на сервере путь задаётся переменной окружения.
+NEWS_FEED_PATH = Path(os.environ.get(
+    'NEWS_FEED_PATH', Path(tempfile.gettempdir()) / 'yanews' / 'news.atom'
+))
+NEWS_FEED_SIZE = 20
+NEWS_FEED_SITE_URL = 'http://localhost:8000'
+
+# Как часто поток новых комментариев шлёт пинг, секунд.
+NEWS_EVENTS_KEEPALIVE = 15
+
+# Допустимое число SQL-запросов на один запрос к маршруту, с учётом
+# чтения сессии и пользователя. Проверяется тестами и QueryBudgetMiddleware.
+QUERY_BUDGETS = {
+    'news:home': 3,
+    # Ещё один запрос на странице, где ранжированные совпадения кончаются.
+    'news:search': 4,
+    'news:detail': 7,
+    # Проверка, что новость существует, и комментарии, если их нет в кэше.
+    'news:comments': 4,
+    'news:edit': 4,
+    'news:delete': 7,
+    # Запрос к базе нужен, только если файла ленты ещё нет.
+    'news:feed': 1,
+    'news:api_list': 1,
+    # Комментарии читаются уже после ответа, при потоковой отдаче.
+    'news:api_detail': 1,
+    'admin:news_news_changelist': 5,
+    'admin:news_news_change': 6,
+}
+
+# Дополнительные источники запрещённых слов для комментариев.
+BAD_WORDS_FILE = None
+BAD_WORDS_FROM_DB = False
+BAD_WORDS_RELOAD_INTERVAL = 5
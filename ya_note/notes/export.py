@@ -0,0 +1,137 @@
+"""
+Потоковая выгрузка заметок пользователя.
+
+Заметки читаются из базы пачками через iterator() и сразу отдаются
+клиенту, поэтому память не зависит от их числа. ZIP пишется без
+zipfile: тот держит сведения о каждом файле в памяти до конца архива,
+а здесь записи центрального каталога копятся во временном файле.
+"""
+import json
+import struct
+import tempfile
+import time
+import zlib
+
+from .models import Note
+
+EXPORT_FIELDS = ('id', 'title', 'slug', 'text')
+EXPORT_CHUNK_SIZE = 2000
+# Сколько байт центрального каталога держать в памяти до записи на диск.
+SPOOL_SIZE = 1 << 20
+COPY_SIZE = 1 << 16
+
+ZIP_VERSION = 20
+ZIP64_VERSION = 45
+ZIP_UTF8_FLAG = 0x800
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_COUNT_LIMIT = 0xFFFF
+
+
+def export_rows(author):
+    return Note.objects.filter(author=author).order_by('id').values(
+        *EXPORT_FIELDS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_ndjson(author):
+    """Одна заметка — одна строка JSON."""
+    for row in export_rows(author):
+        yield (json.dumps(row, ensure_ascii=False) + '\n').encode()
+
+
+def note_markdown(row):
+    return f'# {row["title"]}\n\n{row["text"]}\n'.encode()
+
+
+def dos_datetime(timestamp):
+    """Дата и время в формате MS-DOS, как их хранит ZIP."""
+    moment = time.localtime(timestamp)
+    return (
+        (moment.tm_year - 1980) << 9 | moment.tm_mon << 5 | moment.tm_mday,
+        moment.tm_hour << 11 | moment.tm_min << 5 | moment.tm_sec // 2,
+    )
+
+
+class ZipStream:
+    """
+    Архив ZIP, который отдаётся по частям по мере добавления файлов.
+
+    Каждый файл сжимается целиком, поэтому его размер и CRC известны
+    до записи заголовка. Начиная с 65 535 файлов или 4 ГиБ архив
+    дополняется записями ZIP64.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.count = 0
+        self.date, self.time = dos_datetime(time.time())
+        self.directory = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+
+    def add(self, name, data):
+        """Возвращает байты локального заголовка и сжатого файла."""
+        name = name.encode()
+        crc = zlib.crc32(data)
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        header = struct.pack(
+            '<IHHHHHIIIHH', 0x04034B50, ZIP_VERSION, ZIP_UTF8_FLAG,
+            ZIP_DEFLATED, self.time, self.date, crc, len(compressed),
+            len(data), len(name), 0,
+        ) + name
+        self.write_directory_entry(name, crc, len(compressed), len(data))
+        self.offset += len(header) + len(compressed)
+        self.count += 1
+        return header + compressed
+
+    def write_directory_entry(self, name, crc, compressed_size, size):
+        extra = b''
+        offset = self.offset
+        version = ZIP_VERSION
+        if offset >= ZIP64_LIMIT:
+            extra = struct.pack('<HHQ', 0x0001, 8, offset)
+            offset = ZIP64_LIMIT
+            version = ZIP64_VERSION
+        self.directory.write(struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014B50, version, version,
+            ZIP_UTF8_FLAG, ZIP_DEFLATED, self.time, self.date, crc,
+            compressed_size, size, len(name), len(extra), 0, 0, 0, 0,
+            offset,
+        ) + name + extra)
+
+    def close(self):
+        """Центральный каталог и конец архива, частями."""
+        directory_offset = self.offset
+        directory_size = self.directory.tell()
+        self.directory.seek(0)
+        while True:
+            chunk = self.directory.read(COPY_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        self.directory.close()
+        end_offset = directory_offset + directory_size
+        count = self.count
+        if (
+            count >= ZIP_COUNT_LIMIT or directory_offset >= ZIP64_LIMIT
+            or directory_size >= ZIP64_LIMIT
+        ):
+            yield struct.pack(
+                '<IQHHIIQQQQ', 0x06064B50, 44, ZIP64_VERSION, ZIP64_VERSION,
+                0, 0, count, count, directory_size, directory_offset,
+            ) + struct.pack('<IIQI', 0x07064B50, 0, end_offset, 1)
+            count = min(count, ZIP_COUNT_LIMIT)
+            directory_size = min(directory_size, ZIP64_LIMIT)
+            directory_offset = min(directory_offset, ZIP64_LIMIT)
+        yield struct.pack(
+            '<IHHHHIIH', 0x06054B50, 0, 0, count, count, directory_size,
+            directory_offset, 0,
+        )
+
+
+def iter_zip(author):
+    """Архив с файлом <slug>.md на каждую заметку."""
+    archive = ZipStream()
+    for row in export_rows(author):
+        yield archive.add(f'{row["slug"]}.md', note_markdown(row))
+    yield from archive.close()
@@ -0,0 +1,262 @@
+"""
+Массовая загрузка заметок из NDJSON или ZIP с файлами Markdown.
+
+Записи читаются потоком, проверяются и вставляются пакетами через
+bulk_create. slug выдаёт SlugAllocator: занятые slug для пакета
+читаются одним запросом, дальше совпадения разбираются в памяти.
+"""
+import io
+import json
+import time
+import zipfile
+import zlib
+from itertools import islice
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.template.defaultfilters import filesizeformat
+
+from .models import Note
+from .slugs import SlugAllocator, base_slug
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+class ImportFormatError(Exception):
+    """Файл нельзя разобрать как NDJSON или ZIP."""
+
+
+class InvalidRecord(Exception):
+    """Запись, которую не удалось прочитать; пропускается с ошибкой."""
+
+
+def iter_ndjson(stream):
+    """Пары (номер строки, объект); вместо битого JSON — InvalidRecord."""
+    lines = io.TextIOWrapper(stream, encoding='utf-8')
+    try:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield f'строка {number}', json.loads(line)
+            except ValueError:
+                yield f'строка {number}', InvalidRecord('некорректный JSON.')
+    except UnicodeDecodeError:
+        raise ImportFormatError('Файл должен быть в кодировке UTF-8.')
+    finally:
+        lines.detach()
+
+
+def parse_markdown(slug, content):
+    """Заметка из файла: заголовок в строке «# ...», дальше текст."""
+    first_line, _, rest = content.partition('\n')
+    if first_line.startswith('# '):
+        return {
+            'title': first_line[2:].strip(),
+            'text': rest.strip('\n'),
+            'slug': slug,
+        }
+    return {'title': slug, 'text': content.strip('\n'), 'slug': slug}
+
+
+def read_entry(archive, info, limit):
+    """
+    Распакованное содержимое файла, но не больше limit + 1 байт.
+
+    Размер из заголовка архива проверяется заранее, но ему нельзя
+    верить, поэтому чтение тоже ограничено. Для файла, который уже
+    по заголовку больше limit, возвращается None.
+    """
+    if info.file_size > limit:
+        return None
+    try:
+        with archive.open(info) as entry:
+            return entry.read(limit + 1)
+    except (zipfile.BadZipFile, zlib.error):
+        raise ImportFormatError('Повреждённый ZIP-архив.')
+
+
+def entry_record(slug, data, limit):
+    if data is None or len(data) > limit:
+        return InvalidRecord(f'файл больше {filesizeformat(limit)}.')
+    try:
+        content = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return InvalidRecord('файл не в кодировке UTF-8.')
+    return parse_markdown(slug, content)
+
+
+def iter_zip(stream):
+    """
+    Пары (имя файла, объект) для файлов .md из архива.
+
+    Файл больше NOTES_IMPORT_MAX_NOTE_SIZE пропускается с ошибкой,
+    а на файлах сверх NOTES_IMPORT_MAX_UNPACKED_SIZE в сумме загрузка
+    прерывается.
+    """
+    max_note_size = settings.NOTES_IMPORT_MAX_NOTE_SIZE
+    max_unpacked_size = settings.NOTES_IMPORT_MAX_UNPACKED_SIZE
+    unpacked_size = 0
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ImportFormatError('Повреждённый ZIP-архив.')
+    with archive:
+        for info in archive.infolist():
+            path = PurePosixPath(info.filename)
+            if info.is_dir() or path.suffix != '.md':
+                continue
+            data = read_entry(archive, info, max_note_size)
+            unpacked_size += len(data or b'')
+            if unpacked_size > max_unpacked_size:
+                raise ImportFormatError(
+                    'Распакованный архив больше '
+                    f'{filesizeformat(max_unpacked_size)}.'
+                )
+            yield info.filename, entry_record(path.stem, data, max_note_size)
+
+
+def iter_records(stream, file_format='auto'):
+    """Записи из NDJSON или ZIP; формат определяется по сигнатуре."""
+    if file_format == 'auto':
+        file_format = 'zip' if stream.read(4) == ZIP_MAGIC else 'ndjson'
+        stream.seek(0)
+    if file_format == 'zip':
+        return iter_zip(stream)
+    return iter_ndjson(stream)
+
+
+class NoteImporter:
+    """
+    Загружает заметки автора пакетами по batch_size записей.
+
+    Записи с ошибками пропускаются, первые MAX_REPORTED_ERRORS из них
+    сохраняются в errors. Занятый slug из файла получает номер, как
+    slug из заголовка, такие заметки считаются в renamed. После
+    каждого пакета вызывается progress(importer).
+
+    Каждый пакет вставляется в своей транзакции, поэтому пакеты до
+    ImportFormatError остаются в базе; сообщение для пользователя
+    с этими пакетами собирает interrupted().
+    """
+
+    def __init__(self, author, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        self.author = author
+        self.batch_size = batch_size
+        self.progress = progress
+        self.slug_field = Note._meta.get_field('slug')
+        self.slugs = self.new_allocator()
+        self.processed = 0
+        self.imported = 0
+        self.renamed = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def new_allocator(self):
+        return SlugAllocator(Note.objects.all(), self.slug_field.max_length)
+
+    @property
+    def rate(self):
+        """Обработано записей в секунду."""
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed if elapsed else 0
+
+    def interrupted(self, error):
+        """Текст ImportFormatError и то, что успело загрузиться до неё."""
+        if not self.imported:
+            return str(error)
+        return (
+            f'{error} Загрузка прервана: до ошибки обработано записей '
+            f'{self.processed}, из них загружено заметок {self.imported}.'
+        )
+
+    def reject(self, label, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'{label}: {message}')
+
+    def build(self, label, record):
+        """Проверенная заметка без slug или None, если в записи ошибки."""
+        if isinstance(record, InvalidRecord):
+            self.reject(label, str(record))
+            return None
+        if not isinstance(record, dict):
+            self.reject(label, 'ожидался объект JSON.')
+            return None
+        note = Note(
+            title=record.get('title'),
+            text=record.get('text'),
+            author=self.author,
+        )
+        slug = record.get('slug') or ''
+        try:
+            note.full_clean(exclude=('author', 'slug'), validate_unique=False)
+            if slug:
+                slug = self.slug_field.clean(slug, note)
+        except ValidationError as error:
+            self.reject(label, ' '.join(error.messages))
+            return None
+        note.slug = slug
+        return note
+
+    def assign_slugs(self, notes, requested):
+        """
+        Раздаёт slug пакету, возвращает число заменённых slug из файла.
+
+        slugify заметно дороже остального разбора, поэтому основа
+        slug из заголовка считается один раз на заметку.
+        """
+        max_length = self.slug_field.max_length
+        bases = [
+            slug or base_slug(note.title, max_length)
+            for note, slug in zip(notes, requested)
+        ]
+        self.slugs.prefetch_bases(bases)
+        renamed = 0
+        for note, slug, base in zip(notes, requested, bases):
+            note.slug = self.slugs.claim(base)
+            renamed += bool(slug) and note.slug != slug
+        return renamed
+
+    def insert(self, notes):
+        """
+        Вставляет пакет одним bulk_create.
+
+        Если slug успел занять другой запрос, занятые slug читаются
+        заново и пакет вставляется ещё раз.
+        """
+        requested = [note.slug for note in notes]
+        try:
+            renamed = self.assign_slugs(notes, requested)
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+        except IntegrityError:
+            self.slugs = self.new_allocator()
+            renamed = self.assign_slugs(notes, requested)
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+        self.imported += len(notes)
+        self.renamed += renamed
+
+    def run(self, records):
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            notes = [
+                note for note in (
+                    self.build(label, record) for label, record in batch
+                ) if note is not None
+            ]
+            if notes:
+                self.insert(notes)
+            self.processed += len(batch)
+            if self.progress:
+                self.progress(self)
+        return self
@@ -0,0 +1,149 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from notes.models import Note
+from notes.slugs import SlugAllocator
+
+# Сколько имён пользователей проверять на занятость одним запросом.
+USERNAMES_CHECK_SIZE = 500
+
+TOPICS = (
+    'Список покупок', 'Планы на неделю', 'Идеи', 'Книги', 'Фильмы',
+    'Рецепт', 'Встреча', 'Заметка', 'Дела на завтра', 'Подарки',
+    'Пароль от Wi-Fi', 'Цитаты', 'Тренировка', 'Отпуск', 'Работа',
+)
+WORDS = (
+    'купить', 'молоко', 'хлеб', 'позвонить', 'маме', 'отправить', 'отчёт',
+    'прочитать', 'статью', 'записаться', 'к', 'врачу', 'не', 'забыть',
+    'ключи', 'оплатить', 'счёт', 'встретиться', 'с', 'друзьями', 'в',
+    'субботу', 'посмотреть', 'кино', 'вечером', 'и', 'на', 'выходных',
+)
+
+
+def free_usernames(user_model, count):
+    """
+    Имена вида user<N>, которых ещё нет в базе, count штук.
+
+    Номера начинаются после наибольшего id пользователя, но такое имя
+    могло быть создано раньше, поэтому занятые имена пропускаются.
+    """
+    number = user_model.objects.aggregate(last=Max('pk'))['last'] or 0
+    while count > 0:
+        candidates = [
+            f'user{number + index}'
+            for index in range(1, min(count, USERNAMES_CHECK_SIZE) + 1)
+        ]
+        number += len(candidates)
+        taken = set(user_model.objects.filter(
+            username__in=candidates
+        ).values_list('username', flat=True))
+        for name in candidates:
+            if name not in taken:
+                count -= 1
+                yield name
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей и заметки пакетами bulk_create. '
+        'Размеры заметок распределены с длинным хвостом, а заголовки '
+        'повторяются и дают одинаковые slug после slugify.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк в одном INSERT и одной транзакции.'
+        )
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.slugs = SlugAllocator(
+            Note.objects.all(), Note._meta.get_field('slug').max_length
+        )
+        self.topic_weights = list(accumulate(
+            1 / rank for rank in range(1, len(TOPICS) + 1)
+        ))
+        started = time.perf_counter()
+        user_ids = self.create_users(options['users'])
+        if user_ids:
+            self.insert(Note, self.notes(user_ids), options['notes'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с, '
+            f'совпадений slug: {self.slugs.collisions}'
+        ))
+
+    def insert(self, model, rows, total):
+        """Вставляет строки из генератора пакетами и печатает скорость."""
+        started = time.perf_counter()
+        inserted = 0
+        while inserted < total:
+            batch = [
+                next(rows)
+                for _ in range(min(self.batch_size, total - inserted))
+            ]
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            inserted += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{model.__name__}: {inserted}/{total}, '
+                f'{inserted / elapsed:.0f} строк/с'
+            )
+
+    def create_users(self, count):
+        user_model = get_user_model()
+        last_id = user_model.objects.aggregate(last=Max('pk'))['last'] or 0
+        password = make_password(None)
+        rows = (
+            user_model(username=name, password=password)
+            for name in free_usernames(user_model, count)
+        )
+        self.insert(user_model, rows, count)
+        return list(
+            user_model.objects.filter(pk__gt=last_id)
+            .values_list('pk', flat=True)
+        )
+
+    def title(self):
+        """
+        Заголовок из небольшого набора тем.
+
+        Регистр, номер и знаки препинания меняются, но slugify часто
+        сводит такие заголовки к одному slug.
+        """
+        rng = self.rng
+        title = rng.choices(TOPICS, cum_weights=self.topic_weights)[0]
+        if rng.random() < 0.3:
+            title = title.lower()
+        if rng.random() < 0.3:
+            title += rng.choice(('!', '...', ' :)', '?'))
+        if rng.random() < 0.2:
+            title += f' {rng.randint(1, 50)}'
+        return title
+
+    def text(self):
+        """Длина в словах — логнормальная: много коротких, мало огромных."""
+        length = max(1, int(self.rng.lognormvariate(2.5, 1.3)))
+        return ' '.join(self.rng.choices(WORDS, k=length))
+
+    def notes(self, user_ids):
+        while True:
+            title = self.title()
+            yield Note(
+                title=title,
+                text=self.text(),
+                slug=self.slugs.allocate(title),
+                author_id=self.rng.choice(user_ids),
+            )
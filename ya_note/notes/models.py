@@ -1,7 +1,10 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import SlugAllocator
+
+# Сколько раз выбирать slug заново, если его успел занять другой запрос.
+SLUG_ATTEMPTS = 3
 
 
 class Note(models.Model):
@@ -28,11 +31,35 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Без slug заметка получает первый свободный slug из заголовка.
+
+        Заново slug выбирается, только если IntegrityError вызван тем,
+        что его успел занять другой запрос; прочие ошибки не скрываются.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_length = self._meta.get_field('slug').max_length
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = SlugAllocator(
+                Note.objects.exclude(pk=self.pk), max_length
+            ).allocate(self.title)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = Note.objects.exclude(pk=self.pk).filter(
+                    slug=self.slug
+                ).exists()
+                if not taken or attempt == SLUG_ATTEMPTS:
+                    self.slug = ''
+                    raise
@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+
+
+class InvalidCursor(Exception):
+    """Курсор повреждён или не соответствует сортировке."""
+
+
+def encode_cursor(values):
+    """Упаковывает значения полей сортировки в непрозрачную строку."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Распаковывает список из length значений, записанный encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    return values
+
+
+class CursorPage:
+    """Страница, полученная по курсору."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def paginate_by_id(queryset, per_page, after=None, before=None):
+    """
+    Страница записей по возрастанию id после id after или перед before.
+
+    Вместо OFFSET страница выбирается условием на id, поэтому при
+    индексе, который кончается на id, стоимость любой страницы одинакова.
+    Курсор — просто id крайней записи страницы.
+    """
+    try:
+        after, before = (
+            int(value) if value else None for value in (after, before)
+        )
+    except ValueError:
+        raise InvalidCursor(after or before)
+    limit = per_page + 1
+    if before is not None:
+        items = list(queryset.filter(id__lt=before).order_by('-id')[:limit])
+        has_previous = len(items) > per_page
+        items = items[:per_page][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        items = list(queryset.order_by('id')[:limit])
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        has_previous = after is not None
+    if not items:
+        return CursorPage(items)
+    return CursorPage(
+        items,
+        next_cursor=items[-1].id if has_next else None,
+        previous_cursor=items[0].id if has_previous else None,
+    )
@@ -0,0 +1,152 @@
+import re
+
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+from .pagination import (
+    CursorPage, InvalidCursor, decode_cursor, encode_cursor
+)
+
+WORD_RE = re.compile(r'\w+')
+
+# Совпадение в заголовке весит больше, чем в тексте; автор не влияет.
+RANK_SQL = 'bm25(notes_note_fts, 10.0, 1.0, 0.0)'
+
+# Границы совпадений во фрагменте. Служебные символы не встречаются
+# в тексте заметок и заменяются на <mark> после экранирования.
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 16
+
+# Фрагменты строятся уже для одной страницы: MATCH проходит один раз
+# по диапазону rowid страницы, а «+» не даёт SQLite искать каждую строку
+# отдельным MATCH — для префиксных запросов это во много раз дороже.
+PAGE_SQL = '''
+    SELECT notes_note.id, notes_note.title, notes_note.slug, found.score,
+        snippet(notes_note_fts, 1, %s, %s, '…', %s) AS snippet
+    FROM notes_note_fts CROSS JOIN found CROSS JOIN notes_note
+    WHERE notes_note_fts MATCH %s
+        AND notes_note_fts.rowid BETWEEN (SELECT min(rowid) FROM found)
+            AND (SELECT max(rowid) FROM found)
+        AND found.rowid = +notes_note_fts.rowid
+        AND notes_note.id = found.rowid
+'''
+
+# Ранжируются только NOTES_SEARCH_CANDIDATES самых свежих совпадений
+# автора: FTS5 отдаёт их по убыванию rowid без сортировки.
+SEARCH_SQL = f'''
+    WITH candidates AS (
+        SELECT rowid, {RANK_SQL} AS score
+        FROM notes_note_fts
+        WHERE notes_note_fts MATCH %s
+        ORDER BY rowid DESC
+        LIMIT %s
+    ), found AS (
+        SELECT rowid, score FROM candidates
+        {{seek}}
+        ORDER BY score, rowid
+        LIMIT %s
+    )
+    {PAGE_SQL}
+    ORDER BY found.score, notes_note.id
+'''
+
+# Совпадения старше ранжируемых идут после них без ранга, от новых
+# к старым. Запрос нужен, только когда ранжированные закончились.
+OLDER_SQL = f'''
+    WITH found AS (
+        SELECT rowid, NULL AS score
+        FROM notes_note_fts
+        WHERE notes_note_fts MATCH %s AND rowid < COALESCE((
+            SELECT rowid FROM notes_note_fts
+            WHERE notes_note_fts MATCH %s
+            ORDER BY rowid DESC LIMIT 1 OFFSET %s
+        ), 0) {{seek}}
+        ORDER BY rowid DESC
+        LIMIT %s
+    )
+    {PAGE_SQL}
+    ORDER BY notes_note.id DESC
+'''
+
+SEEK_SQL = 'WHERE (score, rowid) > (%s, %s)'
+
+OLDER_SEEK_SQL = 'AND rowid < %s'
+
+
+def build_match_query(author_id, text):
+    """
+    Превращает строку пользователя в безопасный запрос FTS5.
+
+    Каждое слово ищется как префикс в заголовке и тексте, все слова
+    должны встретиться, а заметки ограничены автором. Синтаксис FTS5
+    из ввода не интерпретируется.
+    """
+    words = WORD_RE.findall(text.lower())
+    if not words:
+        return ''
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f'author_id : "{int(author_id)}" AND {{title text}} : ({terms})'
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и отмечает совпадения тегом <mark>."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def read_cursor(cursor):
+    """Пара (ранг, id) из курсора; ранг None у курсора среди старых."""
+    score, note_id = decode_cursor(cursor, 2)
+    try:
+        return (None if score is None else float(score)), int(note_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def search_notes(author_id, text, per_page, after=None):
+    """
+    Полнотекстовый поиск по заметкам автора с сортировкой по bm25.
+
+    У найденных заметок загружены id, title и slug, а в snippet —
+    фрагмент текста с отмеченными совпадениями. Страницы выбираются
+    по курсору из пары (ранг, id). Ранжируются не более
+    NOTES_SEARCH_CANDIDATES самых свежих совпадений, остальные
+    выдаются следом по убыванию id.
+    """
+    match = build_match_query(author_id, text)
+    if not match:
+        return CursorPage([])
+    score, note_id = read_cursor(after) if after else (None, None)
+    candidates = settings.NOTES_SEARCH_CANDIDATES
+    snippet = [MARK_START, MARK_END, SNIPPET_TOKENS, match]
+    items = []
+    if not after or score is not None:
+        seek = [score, note_id] if after else []
+        items = list(Note.objects.raw(
+            SEARCH_SQL.format(seek=SEEK_SQL if seek else ''),
+            [match, candidates, *seek, per_page + 1, *snippet],
+        ))
+    if len(items) <= per_page:
+        seek = [note_id] if after and score is None else []
+        items += Note.objects.raw(
+            OLDER_SQL.format(seek=OLDER_SEEK_SQL if seek else ''),
+            [match, match, candidates - 1, *seek, per_page + 1 - len(items),
+             *snippet],
+        )
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    for note in items:
+        note.snippet = highlight(note.snippet)
+    return CursorPage(
+        items,
+        next_cursor=(
+            encode_cursor([items[-1].score, items[-1].id]) if has_next
+            else None
+        ),
+    )
@@ -0,0 +1,129 @@
+"""
+Выдача уникальных slug для заметок.
+
+Если slug из заголовка занят, к нему добавляется номер: zametka,
+zametka-2, zametka-3 и так далее. Занятые номера для основы читаются
+одним запросом по диапазону значений slug, который покрывается
+уникальным индексом.
+"""
+from django.db.models import Q
+from pytils.translit import slugify
+
+DEFAULT_SLUG = 'note'
+# Сколько символов основы оставлять под суффикс в запросе по префиксу:
+# хватает на номера до 9 999 999 у длинных заголовков.
+SUFFIX_ROOM = 8
+# Сколько основ проверять одним запросом в пакетном режиме.
+PREFETCH_SIZE = 200
+
+
+def base_slug(title, max_length):
+    return slugify(title)[:max_length] or DEFAULT_SLUG
+
+
+def numbered_slug(base, number, max_length):
+    """Slug с номером number; при нехватке длины основа обрезается."""
+    if number == 1:
+        return base
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+class SlugAllocator:
+    """
+    Раздаёт уникальные slug заметкам из queryset.
+
+    Для каждой основы занятые номера читаются из базы один раз, дальше
+    выданные slug запоминаются в памяти. Поэтому пачке заметок с
+    похожими заголовками нужно по запросу на основу, а не на заметку.
+    Между чтением и записью slug может занять другой запрос: это
+    ловит уникальный индекс, и вызывающий код повторяет попытку.
+    """
+
+    def __init__(self, queryset, max_length):
+        self.queryset = queryset
+        self.max_length = max_length
+        self.taken = {}
+        self.issued = set()
+        self.collisions = 0
+
+    def slug_range(self, base):
+        """
+        Условие на все slug, которые могут быть номерами base.
+
+        Короткой основе номер дописывается целиком, поэтому хватает
+        самой основы и диапазона «base-цифры». Длинную основу номер
+        обрезает, и читаются все slug с её началом.
+        """
+        if len(base) <= self.max_length - SUFFIX_ROOM:
+            return Q(slug=base) | Q(
+                slug__gte=f'{base}-0', slug__lt=f'{base}-:'
+            )
+        prefix = base[:self.max_length - SUFFIX_ROOM]
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return Q(slug__gte=prefix, slug__lt=upper)
+
+    def owners(self, slug, bases):
+        """Основы из bases, для которых slug — один из номеров."""
+        if slug in bases:
+            yield slug, 1
+        head, separator, number = slug.rpartition('-')
+        if not separator or not number.isdigit() or number[0] == '0':
+            return
+        number = int(number)
+        candidates = {head} if head in bases else set()
+        candidates.update(
+            base for base in bases
+            if len(base) > self.max_length - SUFFIX_ROOM
+        )
+        for base in candidates:
+            if numbered_slug(base, number, self.max_length) == slug:
+                yield base, number
+
+    def prefetch(self, titles):
+        """Читает занятые номера для ещё не известных основ заголовков."""
+        self.prefetch_bases(
+            base_slug(title, self.max_length) for title in titles
+        )
+
+    def prefetch_bases(self, bases):
+        """Читает занятые номера для ещё не известных основ."""
+        bases = list(dict.fromkeys(
+            base for base in bases if base not in self.taken
+        ))
+        for start in range(0, len(bases), PREFETCH_SIZE):
+            chunk = set(bases[start:start + PREFETCH_SIZE])
+            condition = Q()
+            for base in chunk:
+                self.taken[base] = set()
+                condition |= self.slug_range(base)
+            for slug in self.queryset.filter(condition).values_list(
+                'slug', flat=True
+            ).iterator():
+                for base, number in self.owners(slug, chunk):
+                    self.taken[base].add(number)
+
+    def allocate(self, title):
+        """Первый свободный slug для заголовка."""
+        return self.claim(base_slug(title, self.max_length))
+
+    def claim(self, base):
+        """Первый свободный slug: основа или основа со следующим номером."""
+        base = base[:self.max_length]
+        if base not in self.taken:
+            self.prefetch_bases([base])
+        taken = self.taken[base]
+        if base in self.issued:
+            taken.add(1)
+        number = 1 if 1 not in taken else max(taken) + 1
+        slug = numbered_slug(base, number, self.max_length)
+        while slug in self.issued:
+            # Номер совпал со slug, выданным другой основе: idei-2
+            # для «Идеи 2» и второй заметки «Идеи».
+            number += 1
+            slug = numbered_slug(base, number, self.max_length)
+        if number > 1:
+            self.collisions += 1
+        taken.add(number)
+        self.issued.add(slug)
+        return slug
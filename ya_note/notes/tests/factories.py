@@ -0,0 +1,53 @@
+"""
+Массовое создание тестовых данных.
+
+Пользователи и заметки вставляются через bulk_create пакетами, без
+save() на каждую строку. Данные создаются в setUpTestData и живут
+всё время тестового класса.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.test import Client
+
+from notes.models import Note
+
+BATCH_SIZE = 500
+
+
+def bulk_insert(model, objs):
+    """
+    Вставляет объекты и возвращает их из базы по порядку вставки.
+
+    bulk_create в SQLite не проставляет id созданным объектам,
+    поэтому они перечитываются одним запросом.
+    """
+    last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    return list(model.objects.filter(pk__gt=last_id).order_by('pk'))
+
+
+def make_users(usernames):
+    user_model = get_user_model()
+    return bulk_insert(
+        user_model, [user_model(username=name) for name in usernames]
+    )
+
+
+def make_notes(author, count, title='Заголовок', text='Просто текст.',
+               slug='slug'):
+    """Заметки автора с адресами slug_0, slug_1, ..."""
+    return bulk_insert(Note, [
+        Note(
+            title=f'{title} {index}',
+            text=text,
+            slug=f'{slug}_{index}',
+            author=author,
+        )
+        for index in range(count)
+    ])
+
+
+def login_client(user):
+    client = Client()
+    client.force_login(user)
+    return client
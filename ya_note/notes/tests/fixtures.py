@@ -1,23 +1,31 @@
-from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.conf import settings
+from django.test import TestCase
 from django.urls import reverse
 
+from .factories import login_client, make_notes, make_users
 from notes.models import Note
 
 
-user = get_user_model()
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов из настройки QUERY_BUDGETS."""
+
+    def assert_query_budget(self, response):
+        view_name = response.resolver_match.view_name
+        budget = settings.QUERY_BUDGETS[view_name]
+        self.assertLessEqual(
+            response.query_count,
+            budget,
+            f'{view_name}: {response.query_count} SQL-запросов '
+            f'при бюджете {budget}'
+        )
 
 
-class Fixtures(TestCase):
+class Fixtures(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpTestData(cls):
-        cls.author = user.objects.create(username='Автор')
-        cls.author_client = Client()
-        cls.author_client.force_login(cls.author)
-
-        cls.not_author = user.objects.create(username='Не автор')
-        cls.not_author_client = Client()
-        cls.not_author_client.force_login(cls.not_author)
+        cls.author, cls.not_author = make_users(('Автор', 'Не автор'))
+        cls.author_client = login_client(cls.author)
+        cls.not_author_client = login_client(cls.not_author)
 
         cls.author_note = Note.objects.create(
             title='Заголовок автора',
@@ -26,16 +34,7 @@ class Fixtures(TestCase):
             author=cls.author
         )
 
-        cls.not_author_notes = [
-            Note(
-                title=f'Заголовок {index}',
-                text='Просто текст.',
-                slug=f'slug_{index}',
-                author=cls.not_author
-            )
-            for index in range(5)
-        ]
-        Note.objects.bulk_create(cls.not_author_notes)
+        cls.not_author_notes = make_notes(cls.not_author, 5)
 
         cls.slug_author = cls.author_note.slug
         cls.notes_home = reverse('notes:home')
@@ -43,6 +42,9 @@ class Fixtures(TestCase):
         cls.users_logout = reverse('users:logout')
         cls.users_signup = reverse('users:signup')
         cls.notes_list = reverse('notes:list')
+        cls.notes_search = reverse('notes:search')
+        cls.notes_export = reverse('notes:export')
+        cls.notes_import = reverse('notes:import')
         cls.notes_success = reverse('notes:success')
         cls.notes_add = reverse('notes:add')
         cls.notes_detail = reverse('notes:detail', args=(cls.slug_author,))
@@ -50,6 +52,15 @@ class Fixtures(TestCase):
         cls.notes_delete = reverse('notes:delete', args=(cls.slug_author,))
 
         cls.redirect_notes_list = f'{cls.users_login}?next={cls.notes_list}'
+        cls.redirect_notes_search = (
+            f'{cls.users_login}?next={cls.notes_search}'
+        )
+        cls.redirect_notes_export = (
+            f'{cls.users_login}?next={cls.notes_export}'
+        )
+        cls.redirect_notes_import = (
+            f'{cls.users_login}?next={cls.notes_import}'
+        )
         cls.redirect_notes_success = (
             f'{cls.users_login}?next={cls.notes_success}'
         )
@@ -1,5 +1,14 @@
+import io
+import json
+import zipfile
+from unittest import mock
+
+from django.test import override_settings
+
+from .factories import make_notes
 from .fixtures import Fixtures
 from notes.forms import NoteForm
+from notes.models import Note
 
 
 class TestContent(Fixtures):
@@ -14,6 +23,23 @@ class TestContent(Fixtures):
         test_authorized_client_has_form()
             - на страницу добавления записи передается форма.
             - на страницу редактирования записи передается форма.
+        test_notes_list_pages_by_cursor()
+            - список заметок листается по курсору без текста заметок.
+        test_search_only_author_notes()
+            - поиск находит только заметки автора, заголовок выше текста,
+              id автора словом для поиска не считается.
+        test_search_snippet_is_escaped()
+            - во фрагменте отмечены совпадения, HTML экранирован.
+        test_search_index_follows_changes()
+            - индекс обновляется при изменении и удалении заметки.
+        test_search_pages_by_cursor()
+            - результаты поиска листаются по курсору без повторов.
+        test_search_lists_older_matches_after_candidates()
+            - совпадения старше ранжируемых идут следом от новых к старым.
+        test_export_ndjson()
+            - выгрузка NDJSON содержит только заметки автора.
+        test_export_zip()
+            - в архиве по файлу Markdown на заметку, в том числе с ZIP64.
     """
 
     def test_only_author_notes(self):
@@ -37,3 +63,137 @@ class TestContent(Fixtures):
                 response = self.author_client.get(url_path)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    @override_settings(NOTES_COUNT_ON_PAGE=10)
+    def test_notes_list_pages_by_cursor(self):
+        notes = [self.author_note, *make_notes(self.author, 24, slug='page')]
+        seen = []
+        params = {}
+        while True:
+            response = self.author_client.get(self.notes_list, params)
+            self.assert_query_budget(response)
+            page = response.context['page_obj']
+            self.assertLessEqual(len(page), 10)
+            for note in page:
+                self.assertIn('text', note.get_deferred_fields())
+            seen.extend(page)
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(seen, notes)
+        back = self.author_client.get(
+            self.notes_list, {'before': page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), notes[10:20])
+        response = self.author_client.get(self.notes_list, {'after': '!'})
+        self.assertEqual(response.status_code, 404)
+
+    def search(self, query, **params):
+        return self.author_client.get(
+            self.notes_search, {'q': query, **params}
+        ).context['page_obj']
+
+    def test_search_only_author_notes(self):
+        in_text = Note.objects.create(
+            title='Другое', text='Купить хлеб', slug='in_text',
+            author=self.author,
+        )
+        in_title = Note.objects.create(
+            title='Хлеб', text='Текст', slug='in_title', author=self.author,
+        )
+        Note.objects.create(
+            title='Хлеб', text='Хлеб', slug='foreign',
+            author=self.not_author,
+        )
+        self.assertEqual(list(self.search('ХЛЕ')), [in_title, in_text])
+        self.assertFalse(self.search('просто').object_list)
+        self.assertFalse(self.search(str(self.author.pk)[0]).object_list)
+        for query in ('" OR author_id : ', 'NEAR(', '***', ''):
+            with self.subTest(query=query):
+                response = self.author_client.get(
+                    self.notes_search, {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_search_snippet_is_escaped(self):
+        Note.objects.create(
+            title='Заметка', text='Тег <b>жирный</b> и слово молоко',
+            slug='escaped', author=self.author,
+        )
+        (note,) = self.search('молоко')
+        self.assertIn('<mark>молоко</mark>', note.snippet)
+        self.assertIn('&lt;b&gt;', note.snippet)
+
+    def test_search_index_follows_changes(self):
+        self.author_note.title = 'Сенсация'
+        self.author_note.save()
+        self.assertEqual(list(self.search('сенсация')), [self.author_note])
+        self.author_note.delete()
+        self.assertFalse(self.search('сенсация').object_list)
+
+    @override_settings(NOTES_COUNT_ON_PAGE=10)
+    def test_search_pages_by_cursor(self):
+        notes = make_notes(self.author, 25, text='слово', slug='found')
+        seen = []
+        params = {}
+        while True:
+            page = self.search('слово', **params)
+            seen.extend(note.id for note in page)
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(sorted(seen), [note.id for note in notes])
+
+    @override_settings(NOTES_SEARCH_CANDIDATES=3, NOTES_COUNT_ON_PAGE=2)
+    def test_search_lists_older_matches_after_candidates(self):
+        notes = make_notes(self.author, 5, text='слово', slug='found')
+        seen = []
+        params = {}
+        while True:
+            page = self.search('слово', **params)
+            seen.extend(note.id for note in page)
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+        ids = [note.id for note in notes]
+        self.assertEqual(sorted(seen[:3]), ids[2:])
+        self.assertEqual(seen[3:], [ids[1], ids[0]])
+
+    def export(self, **params):
+        response = self.author_client.get(self.notes_export, params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_export_ndjson(self):
+        rows = [
+            json.loads(line)
+            for line in self.export(format='ndjson').decode().splitlines()
+        ]
+        self.assertEqual(rows, [{
+            'id': self.author_note.id,
+            'title': self.author_note.title,
+            'slug': self.author_note.slug,
+            'text': self.author_note.text,
+        }])
+        response = self.author_client.get(
+            self.notes_export, {'format': 'pdf'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_zip(self):
+        notes = [self.author_note, *make_notes(self.author, 4, slug='zip')]
+        for limit in (0xFFFF, 3):
+            with self.subTest(count_limit=limit), mock.patch(
+                'notes.export.ZIP_COUNT_LIMIT', limit
+            ):
+                content = self.export(format='zip')
+                archive = zipfile.ZipFile(io.BytesIO(content))
+                self.assertIsNone(archive.testzip())
+                self.assertEqual(
+                    archive.namelist(), [f'{note.slug}.md' for note in notes]
+                )
+                self.assertEqual(
+                    archive.read(f'{self.author_note.slug}.md').decode(),
+                    f'# {self.author_note.title}\n\n'
+                    f'{self.author_note.text}\n',
+                )
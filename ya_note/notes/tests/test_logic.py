@@ -1,11 +1,24 @@
+import json
+import tempfile
+import zipfile
 from http import HTTPStatus
+from io import BytesIO, StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from pytils.translit import slugify
 
+from .factories import make_users
 from .fixtures import Fixtures
 from notes.forms import NoteForm, WARNING
 from notes.models import Note
+from notes.slugs import SlugAllocator
 
 
 class TestLogic(Fixtures):
@@ -21,6 +34,15 @@ class TestLogic(Fixtures):
             - нельзя создать запись с одинаковым slug.
         test_create_slug_with_slugify()
             - применяется slugify при неуказанном slug.
+        test_equal_titles_get_numbered_slugs()
+            - при совпадении slug из заголовка добавляется номер.
+        test_slug_allocator_batch()
+            - пачка slug выдаётся без повторов одним запросом.
+        test_slug_range_reads_only_numbers()
+            - для короткой основы читаются только она и её номера.
+        test_slug_race_retries()
+            - slug, занятый между выбором и записью, выбирается заново,
+              другие ошибки записи не повторяются.
         test_author_can_delete_note()
             - автор может удалять свои записи.
         test_user_cant_delete_note_of_another_user()
@@ -29,6 +51,20 @@ class TestLogic(Fixtures):
             - автор может редактировать свои записи.
         test_user_cant_edit_note_of_another_user()
             - пользователь не иожет изменять чужие записи.
+        test_cached_auth_profile()
+            - профиль 'cache' читает сессию и пользователя из кэша.
+        test_generate_notes_command()
+            - генератор создаёт заметки с уникальными slug.
+        test_import_ndjson()
+            - загрузка NDJSON пропускает ошибочные строки и нумерует slug.
+        test_import_zip_round_trip()
+            - выгруженный ZIP загружается обратно.
+        test_import_zip_limits()
+            - распаковка ZIP ограничена по размеру файла и архива.
+        test_import_notes_command()
+            - команда загружает заметки пакетами и печатает скорость.
+        test_import_interrupted_reports_progress()
+            - при обрыве файла сообщается, сколько заметок уже загружено.
     """
 
     @classmethod
@@ -79,6 +115,70 @@ class TestLogic(Fixtures):
         note = Note.objects.get()
         self.assertEqual(note.slug, self.verification_slug)
 
+    def test_equal_titles_get_numbered_slugs(self):
+        del self.form_data['slug']
+        for _ in range(3):
+            self.author_client.post(self.notes_add, data=self.form_data)
+        slugs = Note.objects.filter(
+            title=self.form_data['title']
+        ).values_list('slug', flat=True)
+        self.assertEqual(sorted(slugs), [
+            self.verification_slug,
+            f'{self.verification_slug}-2',
+            f'{self.verification_slug}-3',
+        ])
+        with CaptureQueriesContext(connection) as context:
+            slug = SlugAllocator(Note.objects.all(), 100).allocate(
+                self.form_data['title']
+            )
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(slug, f'{self.verification_slug}-4')
+
+    def test_slug_allocator_batch(self):
+        long_title = 'Очень длинный заголовок ' * 10
+        titles = ['Идеи', 'Идеи 2', 'Идеи', 'Идеи', long_title, long_title]
+        allocator = SlugAllocator(Note.objects.all(), 100)
+        with CaptureQueriesContext(connection) as context:
+            allocator.prefetch(titles)
+            slugs = [allocator.allocate(title) for title in titles]
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(slugs[:4], ['idei', 'idei-2', 'idei-3', 'idei-4'])
+        self.assertEqual(len(slugs[5]), 100)
+        self.assertEqual(slugs[5], slugs[4][:98] + '-2')
+        self.assertEqual(allocator.collisions, 3)
+
+    def test_slug_range_reads_only_numbers(self):
+        slugs = ('zametka', 'zametka-2', 'zametka-o-dele', 'zametkaa')
+        Note.objects.bulk_create(
+            Note(title='Заметка', text='Текст', slug=slug, author=self.author)
+            for slug in slugs
+        )
+        allocator = SlugAllocator(Note.objects.all(), 100)
+        self.assertEqual(
+            sorted(Note.objects.filter(
+                allocator.slug_range('zametka')
+            ).values_list('slug', flat=True)),
+            ['zametka', 'zametka-2'],
+        )
+        self.assertEqual(allocator.allocate('Заметка'), 'zametka-3')
+
+    def test_slug_race_retries(self):
+        note = Note(title='Гонка', text='Текст', author=self.author)
+        with mock.patch.object(
+            SlugAllocator, 'allocate',
+            side_effect=[self.author_note.slug, 'gonka'],
+        ):
+            note.save()
+        self.assertEqual(Note.objects.get(pk=note.pk).slug, 'gonka')
+        note = Note(title='Без текста', text=None, author=self.author)
+        with mock.patch.object(
+            SlugAllocator, 'allocate', return_value='bez-teksta'
+        ) as allocate:
+            with self.assertRaises(IntegrityError):
+                note.save()
+        self.assertEqual(allocate.call_count, 1)
+        self.assertEqual(note.slug, '')
+
     def test_author_can_delete_note(self):
         notes_count_start = Note.objects.count()
         self.author_client.delete(self.notes_delete)
@@ -108,3 +208,165 @@ class TestLogic(Fixtures):
         self.assertEqual(check_note.text, self.author_note.text)
         self.assertEqual(check_note.author, self.author_note.author)
         self.assertEqual(check_note.slug, self.author_note.slug)
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        AUTHENTICATION_BACKENDS=['notes.auth.CachedModelBackend'],
+    )
+    def test_cached_auth_profile(self):
+        cache.clear()
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.notes_list)
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.notes_list)
+        queries = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('django_session', queries)
+        self.assertNotIn('FROM "auth_user"', queries)
+        self.author.first_name = 'Имя'
+        self.author.save()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.notes_list)
+        queries = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertIn('FROM "auth_user"', queries)
+        self.assertEqual(response.context['user'].first_name, 'Имя')
+
+    def test_generate_notes_command(self):
+        notes_count_start = Note.objects.count()
+        # Имя, которое генератор выбрал бы первым: после наибольшего id.
+        make_users([f'user{self.not_author.pk + 2}'])
+        call_command(
+            'generate_notes', '--users', '3', '--notes', '300',
+            '--batch-size', '100', '--seed', '1', stdout=StringIO()
+        )
+        self.assertEqual(Note.objects.count(), notes_count_start + 300)
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), len(set(slugs)))
+        new_notes = Note.objects.exclude(author__in=(
+            self.author, self.not_author
+        ))
+        for note in new_notes[:50]:
+            self.assertTrue(note.slug.startswith(slugify(note.title)))
+
+    def upload(self, client, name, content):
+        return client.post(
+            self.notes_import, {'file': SimpleUploadedFile(name, content)}
+        )
+
+    def test_import_ndjson(self):
+        lines = [
+            json.dumps({'title': 'Свой slug', 'text': 'Т', 'slug': 'own'}),
+            json.dumps({
+                'title': 'Занятый', 'text': 'Т', 'slug': self.slug_author
+            }),
+            json.dumps({'title': 'Идеи', 'text': 'Т'}),
+            '{"title": ',
+            json.dumps({'title': '', 'text': 'Т'}),
+        ]
+        content = '\n'.join(lines).encode()
+        response = self.upload(self.not_author_client, 'notes.json', content)
+        importer = response.context['importer']
+        self.assertEqual(
+            (importer.imported, importer.skipped, importer.renamed), (3, 2, 1)
+        )
+        self.assertEqual(
+            [error.split(':')[0] for error in importer.errors],
+            ['строка 4', 'строка 5'],
+        )
+        self.assertEqual(
+            list(Note.objects.filter(text='Т').values_list(
+                'slug', 'author'
+            ).order_by('id')),
+            [
+                ('own', self.not_author.pk),
+                (f'{self.slug_author}-2', self.not_author.pk),
+                ('idei', self.not_author.pk),
+            ],
+        )
+        response = self.upload(self.author_client, 'notes.zip', b'PK\x03\x04')
+        self.assertFormError(
+            response, 'form', 'file', 'Повреждённый ZIP-архив.'
+        )
+
+    def test_import_zip_round_trip(self):
+        response = self.author_client.get(self.notes_export, {'format': 'zip'})
+        content = b''.join(response.streaming_content)
+        response = self.upload(self.not_author_client, 'notes.zip', content)
+        self.assertEqual(response.context['importer'].imported, 1)
+        note = Note.objects.get(author=self.not_author, title=(
+            self.author_note.title
+        ))
+        self.assertEqual(note.text, self.author_note.text)
+        self.assertEqual(note.slug, f'{self.slug_author}-2')
+
+    @override_settings(
+        NOTES_IMPORT_MAX_NOTE_SIZE=1000, NOTES_IMPORT_MAX_UNPACKED_SIZE=2500
+    )
+    def test_import_zip_limits(self):
+        def make_zip(*sizes):
+            content = BytesIO()
+            with zipfile.ZipFile(content, 'w', zipfile.ZIP_DEFLATED) as file:
+                for number, size in enumerate(sizes):
+                    file.writestr(f'bomb-{number}.md', '# Б\n\n' + 'x' * size)
+            return content.getvalue()
+
+        response = self.upload(
+            self.not_author_client, 'notes.zip', make_zip(10, 100_000, 10)
+        )
+        importer = response.context['importer']
+        self.assertEqual((importer.imported, importer.skipped), (2, 1))
+        self.assertTrue(
+            importer.errors[0].startswith('bomb-1.md: файл больше')
+        )
+        response = self.upload(
+            self.not_author_client, 'notes.zip', make_zip(900, 900, 900)
+        )
+        self.assertFormError(
+            response, 'form', 'file', 'Распакованный архив больше 2,4\xa0КБ.'
+        )
+
+    def test_import_notes_command(self):
+        notes_count_start = Note.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as file:
+            for number in range(5):
+                file.write(json.dumps(
+                    {'title': 'Импорт', 'text': f'Текст {number}'}
+                ).encode() + b'\n')
+            file.flush()
+            out = StringIO()
+            with CaptureQueriesContext(connection) as context:
+                call_command(
+                    'import_notes', file.name, '--author',
+                    self.author.username, '--batch-size', '2', stdout=out
+                )
+        self.assertEqual(Note.objects.count(), notes_count_start + 5)
+        self.assertEqual(out.getvalue().count('строк/с'), 3)
+        # Поиск автора и на каждый пакет: выборка slug, SAVEPOINT,
+        # INSERT и RELEASE.
+        self.assertLessEqual(len(context.captured_queries), 1 + 3 * 4)
+        self.assertEqual(
+            sorted(Note.objects.filter(title='Импорт').values_list(
+                'slug', flat=True
+            )),
+            ['import', 'import-2', 'import-3', 'import-4', 'import-5'],
+        )
+
+    @override_settings(NOTES_IMPORT_MAX_UNPACKED_SIZE=2500)
+    def test_import_interrupted_reports_progress(self):
+        notes_count_start = Note.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.zip') as file:
+            with zipfile.ZipFile(file, 'w') as archive:
+                for number in range(3):
+                    archive.writestr(f'part-{number}.md', 'x' * 900)
+            file.flush()
+            with self.assertRaisesMessage(
+                CommandError,
+                'Распакованный архив больше 2,4\xa0КБ. Загрузка прервана: '
+                'до ошибки обработано записей 2, из них загружено заметок 2.'
+            ):
+                call_command(
+                    'import_notes', file.name, '--author',
+                    self.author.username, '--batch-size', '1',
+                    stdout=StringIO(),
+                )
+        self.assertEqual(Note.objects.count(), notes_count_start + 2)
@@ -28,6 +28,9 @@ class TestRoutes(Fixtures):
             (self.users_signup, self.client, OK),
             (self.notes_add, self.author_client, OK),
             (self.notes_list, self.author_client, OK),
+            (self.notes_search, self.author_client, OK),
+            (self.notes_export, self.author_client, OK),
+            (self.notes_import, self.author_client, OK),
             (self.notes_success, self.author_client, OK),
             (self.notes_edit, self.author_client, OK),
             (self.notes_delete, self.author_client, OK),
@@ -50,6 +53,9 @@ class TestRoutes(Fixtures):
     def test_redirect(self):
         url_paths_redirect = (
             (self.notes_list, self.redirect_notes_list),
+            (self.notes_search, self.redirect_notes_search),
+            (self.notes_export, self.redirect_notes_export),
+            (self.notes_import, self.redirect_notes_import),
             (self.notes_success, self.redirect_notes_success),
             (self.notes_add, self.redirect_notes_add),
             (self.notes_detail, self.redirect_notes_detail),
@@ -62,3 +68,31 @@ class TestRoutes(Fixtures):
             ):
                 response = self.client.get(reverse_url)
                 self.assertRedirects(response, redirect_url)
+
+    def test_query_budget(self):
+        form_data = {
+            'title': 'Заголовок', 'text': 'Текст', 'slug': self.slug_author
+        }
+        url_paths_check_budget = (
+            (self.notes_home, self.client, 'get'),
+            (self.notes_home, self.author_client, 'get'),
+            (self.notes_list, self.author_client, 'get'),
+            (self.notes_search, self.author_client, 'get'),
+            (self.notes_export, self.author_client, 'get'),
+            (self.notes_success, self.author_client, 'get'),
+            (self.notes_detail, self.author_client, 'get'),
+            (self.notes_add, self.author_client, 'get'),
+            (self.notes_edit, self.author_client, 'get'),
+            (self.notes_edit, self.author_client, 'post'),
+            (self.notes_delete, self.author_client, 'get'),
+            (self.notes_delete, self.author_client, 'post'),
+            (self.notes_add, self.author_client, 'post'),
+        )
+        for (
+            reverse_url, parametrized_client, method
+        ) in url_paths_check_budget:
+            with self.subTest(reverse_url=reverse_url, method=method):
+                response = getattr(parametrized_client, method)(
+                    reverse_url, data=form_data
+                )
+                self.assert_query_budget(response)
@@ -11,5 +11,8 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('search/', views.NotesSearch.as_view(), name='search'),
+    path('export/', views.NotesExport.as_view(), name='export'),
+    path('import/', views.NotesImport.as_view(), name='import'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
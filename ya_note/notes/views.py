@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .export import iter_ndjson, iter_zip
+from .forms import NoteForm, NoteImportForm
+from .imports import ImportFormatError, NoteImporter, iter_records
 from .models import Note
+from .pagination import InvalidCursor, paginate_by_id
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -50,9 +56,96 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя, разбитый на страницы по курсору.
+
+    Читаются только выводимые поля, без текста заметок. Страница
+    выбирается по индексу (author, id), поэтому её стоимость не зависит
+    от числа и размера заметок.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        return super().get_queryset().only('id', 'slug', 'title')
+
+    def get_context_data(self, **kwargs):
+        try:
+            page = paginate_by_id(
+                self.object_list,
+                settings.NOTES_COUNT_ON_PAGE,
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidCursor:
+            raise Http404('Неверный курсор страницы.')
+        return super().get_context_data(
+            object_list=page.object_list, page_obj=page, **kwargs
+        )
+
+
+class NotesSearch(LoginRequiredMixin, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        try:
+            context['page_obj'] = search_notes(
+                self.request.user.pk,
+                query,
+                settings.NOTES_COUNT_ON_PAGE,
+                after=self.request.GET.get('after'),
+            )
+        except InvalidCursor:
+            raise Http404('Неверный курсор страницы.')
+        context['query'] = query
+        return context
+
+
+class NotesExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя в NDJSON или ZIP потоком."""
+    formats = {
+        'ndjson': (iter_ndjson, 'application/x-ndjson', 'notes.ndjson'),
+        'zip': (iter_zip, 'application/zip', 'notes.zip'),
+    }
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in self.formats:
+            return HttpResponseBadRequest(
+                f'Доступные форматы: {", ".join(self.formats)}.'
+            )
+        stream, content_type, filename = self.formats[export_format]
+        response = StreamingHttpResponse(
+            stream(request.user), content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class NotesImport(LoginRequiredMixin, generic.FormView):
+    """
+    Загрузка заметок из файла в формате выгрузки.
+
+    Записи с ошибками пропускаются, итог показывается на той же
+    странице. Если файл оборвался на середине, в ошибке формы сказано,
+    сколько заметок уже загружено.
+    """
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        importer = NoteImporter(self.request.user)
+        try:
+            importer.run(iter_records(form.cleaned_data['file']))
+        except ImportFormatError as error:
+            form.add_error('file', importer.interrupted(error))
+            return self.form_invalid(form)
+        return self.render_to_response(
+            self.get_context_data(form=form, importer=importer)
+        )
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,3 +89,52 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
+
+# Сколько самых свежих совпадений ранжировать при поиске по заметкам.
+NOTES_SEARCH_CANDIDATES = 1000
+
+# Ограничения на распаковку ZIP при загрузке заметок, байт: один файл
+# заметки и все файлы архива вместе. Защищают от ZIP-бомб.
+NOTES_IMPORT_MAX_NOTE_SIZE = 1 << 20
+NOTES_IMPORT_MAX_UNPACKED_SIZE = 100 << 20
+
+# Для нескольких процессов без общего кэша подойдёт файловый бэкенд:
+# 'django.core.cache.backends.filebased.FileBasedCache'
+# с 'LOCATION': BASE_DIR / 'cache'.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Профиль сессий и аутентификации (переменная окружения AUTH_PROFILE):
+# 'db' — сессия и пользователь читаются из базы на каждый запрос;
+# 'cache' — сессии в кэше с записью в базу (cached_db), пользователь
+# сессии кэшируется на USER_CACHE_TIMEOUT секунд.
+AUTH_PROFILE = os.environ.get('AUTH_PROFILE', 'db')
+
+USER_CACHE_TIMEOUT = 30
+
+if AUTH_PROFILE == 'cache':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+
+# Допустимое число SQL-запросов на один запрос к маршруту, с учётом
+# чтения сессии и пользователя. Проверяется тестами и QueryBudgetMiddleware.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:add': 5,
+    'notes:edit': 5,
+    'notes:detail': 3,
+    'notes:delete': 4,
+    'notes:list': 3,
+    # Ещё один запрос на странице, где ранжированные совпадения кончаются.
+    'notes:search': 4,
+    # Заметки читаются уже после ответа, при потоковой отдаче.
+    'notes:export': 2,
+    # У 'notes:import' бюджета нет: запросов по несколько на каждый
+    # пакет из NoteImporter, их число растёт с размером файла.
+    'notes:success': 2,
+}